@@ -0,0 +1,122 @@
+import argparse
+import functools
+import json
+import os
+import sys
+import time
+
+import LizardSudokuSolver as s
+import DancingLinksSolver as dlx
+import NumpyBackend as nb
+import PuzzleIO as pio
+import ResultCache as rc
+
+#batch runs never read the log, so it is off unless asked for
+def SolvePuzzle(box_size, puzzle, keep_log=False, collect_stats=False, backend="python", strategy="all"):
+    grid = s.CreateSudokuGrid(box_size, keep_log, strategy=strategy)
+    if collect_stats:
+        grid = s.EnableStats(grid)
+
+    return dlx.LoadAndSolve(grid, puzzle, nb.LoadWithNumpy if backend == "numpy" else s.LoadGivens)
+
+#with a cache file, puzzles already in it aren't solved again, unless stats are wanted since a cached result has none
+#cache says where the answer came from, "memory", "disk" or "miss", whenever the cache was asked
+def SolvePuzzleLine(item, collect_stats=False, backend="python", strategy="all", cache_path=None, keep_log=False):
+    index, line = item
+    result = {"index" : index, "puzzle" : line}
+
+    start = time.perf_counter()
+    try:
+        box_size, puzzle = pio.ParsePuzzleString(line)
+        cache = rc.GetProcessCache(cache_path) if cache_path is not None else None
+        cached = None
+        if cache is not None and not collect_stats:
+            cached, source = cache.lookup(box_size, puzzle, keep_log)
+            result["cache"] = source if source is not None else "miss"
+
+        if cached is not None:
+            solved = cached["solved"]
+            solution = cached["solution"]
+            log = cached["log"]
+        else:
+            grid, solved = SolvePuzzle(box_size, puzzle, keep_log, collect_stats, backend, strategy)
+            solution = grid["solution"]
+            log = grid["solution_log"]
+            if cache is not None:
+                cache.put(box_size, puzzle, solved, solution, log)
+            if collect_stats:
+                result["stats"] = s.GetStats(grid)
+
+        result["status"] = "solved" if solved else "unsolvable"
+        result["solution"] = pio.FormatPuzzleString(solution) if solved else None
+        if keep_log:
+            geometry = s.GetGridGeometry(box_size)
+            result["log"] = [text for event in log for text in s.RenderLogEvent(geometry, event)]
+    except Exception as e:
+        result["status"] = "invalid"
+        result["solution"] = None
+        result["error"] = str(e)
+    result["seconds"] = time.perf_counter() - start
+
+    return result
+
+def ReadCorpus(paths):
+    for path in paths:
+        for line in pio.ReadPuzzleLines(path):
+            yield line
+
+#results come back in input order
+def SolveCorpus(lines, workers, chunk_size, collect_stats=False, backend="python", strategy="all", cache_path=None, keep_log=False):
+    solve = functools.partial(SolvePuzzleLine, collect_stats=collect_stats, backend=backend, strategy=strategy, cache_path=cache_path, keep_log=keep_log)
+    return pio.MapPuzzleLines(solve, lines, workers, chunk_size)
+
+def ParseArguments(argv):
+    parser = argparse.ArgumentParser(description="Solve sudoku puzzle corpora without the GUI.")
+    parser.add_argument("inputs", nargs="+", help="puzzle files, one puzzle per line or a grid saved by the GUI")
+    parser.add_argument("-o", "--output", default="-", help="where to write one JSON result per line (default: stdout)")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 1, help="number of worker processes (default: all cores)")
+    parser.add_argument("-c", "--chunk-size", type=int, default=16, help="puzzles handed to a worker at a time (default: 16)")
+    parser.add_argument("-b", "--backend", default="python", choices=("python", "numpy"), help="numpy finds the singles for the whole grid at once before the python techniques run, it needs the optional numpy package (default: python)")
+    parser.add_argument("-s", "--strategy", default="all", choices=sorted(s.STRATEGIES.keys()), help="which logical techniques run before the search takes over (default: all)")
+    parser.add_argument("--cache", help="SQLite file of solved puzzles, repeated puzzles are answered from it and new ones added, it can be shared between runs")
+    parser.add_argument("--log", action="store_true", help="add the solution log to every result, with --cache the log is stored and served from the cache too")
+    parser.add_argument("--stats", help="count calls, time and eliminations per technique and write the totals here, as CSV if the name ends in .csv and JSON otherwise")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = ParseArguments(argv)
+
+    if args.backend == "numpy" and not nb.NUMPY_AVAILABLE:
+        sys.stderr.write("the numpy backend needs numpy installed, pip install numpy\n")
+        return 2
+
+    counts = {"solved" : 0, "unsolvable" : 0, "invalid" : 0}
+    #the workers each have their own cache, so its counters are added up from the results
+    cache_counts = {"memory" : 0, "disk" : 0, "miss" : 0}
+    stats = {}
+    start = time.perf_counter()
+
+    with pio.OpenOutput(args.output) as output:
+        for result in SolveCorpus(ReadCorpus(args.inputs), args.workers, max(1, args.chunk_size), args.stats is not None, args.backend, args.strategy, args.cache, args.log):
+            counts[result["status"]] += 1
+            if "cache" in result:
+                cache_counts[result["cache"]] += 1
+            if "stats" in result:
+                stats = s.MergeStats(stats, result["stats"])
+            output.write(json.dumps(result) + "\n")
+
+    if args.stats is not None:
+        with open(args.stats, "w") as f:
+            if args.stats.lower().endswith(".csv"):
+                f.write(s.StatsToCsv(stats))
+            else:
+                f.write(s.StatsToJson(stats))
+
+    elapsed = time.perf_counter() - start
+    total = sum(counts.values())
+    sys.stderr.write("solved " + str(counts["solved"]) + " unsolvable " + str(counts["unsolvable"]) + " invalid " + str(counts["invalid"]) + " of " + str(total) + " puzzles in " + str(round(elapsed, 3)) + " seconds" + (" cache hits " + str(cache_counts["memory"] + cache_counts["disk"]) + " (memory " + str(cache_counts["memory"]) + " disk " + str(cache_counts["disk"]) + ") misses " + str(cache_counts["miss"]) if args.cache is not None else "") + "\n")
+
+    return 0 if counts["invalid"] == 0 else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,198 @@
+import LizardSudokuSolver as s
+
+#exact cover columns are laid out as cell constraints, then row/number, column/number and box/number constraints
+def GetConstraintColumns(geometry, c, n):
+    grid_length = geometry["grid_length"]
+    cell_count = geometry["cell_count"]
+    row_unit, column_unit, box_unit = geometry["cell_units"][c]
+    return (c, cell_count + row_unit * grid_length + n, cell_count + column_unit * grid_length + n, cell_count + box_unit * grid_length + n)
+
+def BuildExactCover(grid):
+    geometry = grid["geometry"]
+    grid_length = geometry["grid_length"]
+    candidates = grid["candidates"]
+
+    #constraints already met by placed numbers are left out of the matrix
+    satisfied = set()
+    for c in range(geometry["cell_count"]):
+        number = grid["solution"][geometry["row_of"][c]][geometry["column_of"][c]]
+        if number != 0:
+            satisfied.update(GetConstraintColumns(geometry, c, number - 1))
+
+    column_ids = {}
+    for c in range(geometry["cell_count"]):
+        if grid["solution"][geometry["row_of"][c]][geometry["column_of"][c]] != 0:
+            continue
+        for n in range(grid_length):
+            for constraint in GetConstraintColumns(geometry, c, n):
+                if constraint not in satisfied and constraint not in column_ids:
+                    column_ids[constraint] = len(column_ids) + 1
+
+    #node 0 is the root, nodes 1 to len(column_ids) are the column headers
+    header_count = len(column_ids) + 1
+    links = {"left" : list(range(-1, header_count - 1)), "right" : list(range(1, header_count + 1)), "up" : list(range(header_count)), "down" : list(range(header_count)), "column" : list(range(header_count)), "size" : [0] * header_count, "options" : [None] * header_count}
+    links["left"][0] = header_count - 1
+    links["right"][header_count - 1] = 0
+
+    for c in range(geometry["cell_count"]):
+        if grid["solution"][geometry["row_of"][c]][geometry["column_of"][c]] != 0:
+            continue
+        for n in s.MaskToNumbers(candidates[c]):
+            constraints = GetConstraintColumns(geometry, c, n)
+            if any(constraint in satisfied for constraint in constraints):
+                continue
+            AddOption(links, [column_ids[constraint] for constraint in constraints], (c, n))
+
+    return links
+
+def AddOption(links, columns, option):
+    first = len(links["column"])
+    for i in range(len(columns)):
+        node = first + i
+        column = columns[i]
+        links["left"].append(first + (i - 1) % len(columns))
+        links["right"].append(first + (i + 1) % len(columns))
+        links["up"].append(links["up"][column])
+        links["down"].append(column)
+        links["column"].append(column)
+        links["options"].append(option)
+        links["down"][links["up"][column]] = node
+        links["up"][column] = node
+        links["size"][column] += 1
+
+def CoverColumn(links, column):
+    left = links["left"]
+    right = links["right"]
+    up = links["up"]
+    down = links["down"]
+    size = links["size"]
+    node_column = links["column"]
+
+    right[left[column]] = right[column]
+    left[right[column]] = left[column]
+    i = down[column]
+    while i != column:
+        j = right[i]
+        while j != i:
+            down[up[j]] = down[j]
+            up[down[j]] = up[j]
+            size[node_column[j]] -= 1
+            j = right[j]
+        i = down[i]
+
+def UncoverColumn(links, column):
+    left = links["left"]
+    right = links["right"]
+    up = links["up"]
+    down = links["down"]
+    size = links["size"]
+    node_column = links["column"]
+
+    i = up[column]
+    while i != column:
+        j = left[i]
+        while j != i:
+            size[node_column[j]] += 1
+            down[up[j]] = j
+            up[down[j]] = j
+            j = left[j]
+        i = up[i]
+    right[left[column]] = column
+    left[right[column]] = column
+
+#how many search steps go by between calls to the check callback
+CHECK_INTERVAL = 4096
+
+#algorithm x with an explicit stack, always branching on the column with the fewest options left
+#check is called every CHECK_INTERVAL steps and can raise to abandon the search
+def SearchExactCover(links, check=None):
+    right = links["right"]
+    left = links["left"]
+    down = links["down"]
+    size = links["size"]
+    node_column = links["column"]
+
+    chosen = []
+    columns = []
+    steps = 0
+
+    while True:
+        if check is not None:
+            steps += 1
+            if steps % CHECK_INTERVAL == 0:
+                check()
+
+        if right[0] == 0:
+            return [links["options"][r] for r in chosen]
+
+        column = right[0]
+        best = column
+        while column != 0:
+            if size[column] < size[best]:
+                best = column
+                if size[best] <= 1:
+                    break
+            column = right[column]
+
+        CoverColumn(links, best)
+        columns.append(best)
+        r = down[best]
+
+        while r == columns[-1]:
+            UncoverColumn(links, columns.pop())
+            if len(chosen) == 0:
+                return None
+            r = chosen.pop()
+            j = left[r]
+            while j != r:
+                UncoverColumn(links, node_column[j])
+                j = left[j]
+            r = down[r]
+
+        chosen.append(r)
+        j = right[r]
+        while j != r:
+            CoverColumn(links, node_column[j])
+            j = right[j]
+
+def SolveWithDancingLinks(grid):
+    if s.IsGridSolved(grid):
+        return grid, True
+
+    geometry = grid["geometry"]
+    log = grid["solution_log"]
+
+    check = None
+    if grid["progress"] is not None:
+        check = lambda: grid["progress"](grid, "search")
+
+    options = SearchExactCover(BuildExactCover(grid), check)
+
+    if options is None:
+        if log is not None:
+            log.append((s.LOG_NO_SOLUTION, 0, ()))
+        return grid, False
+
+    if log is not None:
+        log.append((s.TECHNIQUE_SEARCH, 0, ()))
+
+    for c, n in sorted(options):
+        x = geometry["row_of"][c]
+        y = geometry["column_of"][c]
+        grid["solution"][x][y] = n + 1
+        s.SetCandidates(grid, c, 0, True)
+        if log is not None:
+            log.append((s.LOG_PLACE, n + 1, (c,)))
+
+    return grid, True
+
+#loads the puzzle with load and lets search finish it, givens that lead to a contradiction come back unsolved like a search that finds nothing
+def LoadAndSolve(grid, puzzle, load=s.LoadGivens):
+    try:
+        grid = load(grid, puzzle)
+    except s.SolveContradiction:
+        if grid["solution_log"] is not None:
+            grid["solution_log"].append((s.LOG_NO_SOLUTION, 0, ()))
+        return grid, False
+
+    return SolveWithDancingLinks(grid)
@@ -1,29 +1,476 @@
-import math
+import json
+import time
+from collections import OrderedDict, deque
 
-def CreateSudokuGrid(box_size):
+#candidates are stored as one bitmask per cell, bit n set means number n + 1 is still possible
+POPCOUNT_TABLE = bytes(bin(i).count("1") for i in range(1 << 16))
+LOWEST_BIT_TABLE = {1 << i: i for i in range(32)}
+
+def PopCount(mask):
+    return POPCOUNT_TABLE[mask & 0xFFFF] + POPCOUNT_TABLE[mask >> 16]
+
+def LowestBit(mask):
+    return LOWEST_BIT_TABLE[mask & -mask]
+
+def MaskToNumbers(mask):
+    numbers = []
+    while mask:
+        bit = mask & -mask
+        numbers.append(LOWEST_BIT_TABLE[bit])
+        mask ^= bit
+    return numbers
+
+class CandidateCellView:
+
+    def __init__(self, candidates, index, grid_length):
+        self.candidates = candidates
+        self.index = index
+        self.grid_length = grid_length
+
+    def __getitem__(self, n):
+        if n < 0 or n >= self.grid_length:
+            raise IndexError("number index out of range")
+        return (self.candidates[self.index] >> n) & 1 == 1
+
+    def __len__(self):
+        return self.grid_length
+
+    def __iter__(self):
+        mask = self.candidates[self.index]
+        for n in range(self.grid_length):
+            yield (mask >> n) & 1 == 1
+
+class CandidateRowView:
+
+    def __init__(self, candidates, x, grid_length):
+        self.candidates = candidates
+        self.x = x
+        self.grid_length = grid_length
+
+    def __getitem__(self, y):
+        if y < 0 or y >= self.grid_length:
+            raise IndexError("column index out of range")
+        return CandidateCellView(self.candidates, self.x * self.grid_length + y, self.grid_length)
+
+    def __len__(self):
+        return self.grid_length
+
+    def __iter__(self):
+        for y in range(self.grid_length):
+            yield self[y]
+
+#solution log entries are (event, number, cells) tuples with flat cell ids, text is only built when the log is read
+LOG_PLACE = 0
+LOG_ELIMINATE = 1
+TECHNIQUE_ONLY_OPTION = 2
+TECHNIQUE_ONLY_POSITION = 3
+TECHNIQUE_SOLUTION_SET = 4
+TECHNIQUE_POINTED_SET = 5
+TECHNIQUE_RESTRICTED_SET = 6
+TECHNIQUE_X_WING = 7
+TECHNIQUE_Y_WING = 8
+TECHNIQUE_XY_CHAIN = 9
+TECHNIQUE_SEARCH = 10
+LOG_NO_SOLUTION = 11
+TECHNIQUE_SWORDFISH = 12
+TECHNIQUE_JELLYFISH = 13
+TECHNIQUE_XYZ_WING = 14
+TECHNIQUE_W_WING = 15
+
+EVENT_NAMES = ("place", "eliminate", "only option", "only position", "solution set", "pointed set", "restricted set", "x-wing", "y-wing", "xy-chain", "search", "no solution", "swordfish", "jellyfish", "xyz-wing", "w-wing")
+
+#these events carry a candidate mask in the number slot instead of a single number
+MASK_EVENTS = (TECHNIQUE_SOLUTION_SET, TECHNIQUE_RESTRICTED_SET)
+
+def FormatCells(geometry, cells):
+    return ", ".join("(" + str(geometry["row_of"][c]) + ", " + str(geometry["column_of"][c]) + ")" for c in cells)
+
+def FormatNumbers(mask):
+    return str({n + 1 for n in MaskToNumbers(mask)})
+
+def RenderLogEvent(geometry, event):
+    kind, number, cells = event
+
+    if kind == LOG_PLACE:
+        return ["Placing number: " + str(number) + " at row: " + str(geometry["row_of"][cells[0]]) + " col: " + str(geometry["column_of"][cells[0]])]
+    if kind == LOG_ELIMINATE:
+        return ["Removing possible " + str(number) + " from row: " + str(geometry["row_of"][c]) + " column: " + str(geometry["column_of"][c]) for c in cells]
+    if kind == TECHNIQUE_ONLY_OPTION:
+        return ["Only option left number: " + str(number) + " at " + FormatCells(geometry, cells)]
+    if kind == TECHNIQUE_ONLY_POSITION:
+        return ["Only position left number: " + str(number) + " at " + FormatCells(geometry, cells)]
+    if kind == TECHNIQUE_SOLUTION_SET:
+        return ["found solution set " + FormatNumbers(number) + " at " + FormatCells(geometry, cells)]
+    if kind == TECHNIQUE_POINTED_SET:
+        return ["found pointed set for number: " + str(number) + " at " + FormatCells(geometry, cells)]
+    if kind == TECHNIQUE_RESTRICTED_SET:
+        return ["found values restricted to one box line " + FormatNumbers(number) + " at " + FormatCells(geometry, cells)]
+    if kind == TECHNIQUE_X_WING:
+        return ["found an xwing for " + str(number) + " at " + FormatCells(geometry, cells)]
+    if kind == TECHNIQUE_SWORDFISH:
+        return ["found a swordfish for " + str(number) + " at " + FormatCells(geometry, cells)]
+    if kind == TECHNIQUE_JELLYFISH:
+        return ["found a jellyfish for " + str(number) + " at " + FormatCells(geometry, cells)]
+    if kind == TECHNIQUE_Y_WING:
+        return ["found a ywing for pivot, wing1, wing2: " + FormatCells(geometry, cells) + " for number: " + str(number)]
+    if kind == TECHNIQUE_XYZ_WING:
+        return ["found an xyzwing for pivot, wing1, wing2: " + FormatCells(geometry, cells) + " for number: " + str(number)]
+    if kind == TECHNIQUE_W_WING:
+        return ["found a wwing for ends, link: " + FormatCells(geometry, cells) + " for number: " + str(number)]
+    if kind == TECHNIQUE_XY_CHAIN:
+        return ["Found XY-chain at these coordinates: " + FormatCells(geometry, cells) + " for number: " + str(number)]
+    if kind == TECHNIQUE_SEARCH:
+        return ["Logic stalled, searching for the remaining numbers"]
+    if kind == LOG_NO_SOLUTION:
+        return ["Search found no solution from the current notes"]
+    return [EVENT_NAMES[kind] + " " + str(number) + " at " + FormatCells(geometry, cells)]
+
+def RenderSolutionLog(grid):
+    lines = []
+    if not isinstance(grid["solution_log"], list):
+        return lines
+    for event in grid["solution_log"]:
+        lines.extend(RenderLogEvent(grid["geometry"], event))
+    return lines
+
+def EventToJson(geometry, event):
+    kind, number, cells = event
+    data = {"event" : EVENT_NAMES[kind], "cells" : [[geometry["row_of"][c], geometry["column_of"][c]] for c in cells]}
+    if kind in MASK_EVENTS:
+        data["numbers"] = [n + 1 for n in MaskToNumbers(number)]
+    else:
+        data["number"] = number
+    return json.dumps(data)
+
+#stands in for the log list and writes every event as one JSON line as soon as it happens
+class NdjsonLogSink:
+
+    def __init__(self, stream, geometry):
+        self.stream = stream
+        self.geometry = geometry
+
+    def append(self, event):
+        self.stream.write(EventToJson(self.geometry, event) + "\n")
+
+def StreamSolutionLog(grid, stream):
+    grid["solution_log"] = NdjsonLogSink(stream, grid["geometry"])
+    return grid
+
+#raised from a progress hook to stop a solve, the grid is left half solved and should be thrown away
+class SolveCancelled(Exception):
+    pass
+
+#raised when a placement disagrees with a number already in the grid, the puzzle is well formed but has no solution
+class SolveContradiction(Exception):
+    pass
+
+#hook(grid, stage) is called before every technique and now and then during search, stage is the technique name or "search"
+def SetProgressHook(grid, hook):
+    grid["progress"] = hook
+    return grid
+
+#per technique counters, grid["stats"] stays None unless EnableStats is called so a normal solve only pays for the None checks
+STAT_FIELDS = ("calls", "seconds", "cells_scanned", "eliminations", "placements", "no_change_calls")
+
+def EnableStats(grid):
+    grid["stats"] = {"techniques" : {}, "cells_scanned" : 0, "eliminations" : 0, "placements" : 0}
+    return grid
+
+def CallTechnique(grid, technique, *args):
+    if grid["progress"] is not None:
+        grid["progress"](grid, technique.__name__)
+
+    stats = grid["stats"]
+    if stats is None:
+        return technique(grid, *args)
+
+    cells_scanned = stats["cells_scanned"]
+    eliminations = stats["eliminations"]
+    placements = stats["placements"]
+    start = time.perf_counter()
+
+    grid = technique(grid, *args)
+
+    seconds = time.perf_counter() - start
+    counters = stats["techniques"].get(technique.__name__)
+    if counters is None:
+        counters = {"calls" : 0, "seconds" : 0.0, "cells_scanned" : 0, "eliminations" : 0, "placements" : 0, "no_change_calls" : 0}
+        stats["techniques"][technique.__name__] = counters
+
+    counters["calls"] += 1
+    counters["seconds"] += seconds
+    counters["cells_scanned"] += stats["cells_scanned"] - cells_scanned
+    counters["eliminations"] += stats["eliminations"] - eliminations
+    counters["placements"] += stats["placements"] - placements
+    if stats["eliminations"] == eliminations and stats["placements"] == placements:
+        counters["no_change_calls"] += 1
+
+    return grid
+
+def GetStats(grid):
+    if grid["stats"] is None:
+        return {}
+    return {name : dict(counters) for name, counters in grid["stats"]["techniques"].items()}
+
+#adds the counters of one solve into a running total, used to sum a whole batch
+def MergeStats(total, stats):
+    for name, counters in stats.items():
+        if name not in total:
+            total[name] = dict(counters)
+            continue
+        for field in STAT_FIELDS:
+            total[name][field] += counters[field]
+    return total
+
+def StatsToJson(stats):
+    return json.dumps(stats, indent=2, sort_keys=True)
+
+def StatsToCsv(stats):
+    lines = ["technique," + ",".join(STAT_FIELDS)]
+    for name in sorted(stats.keys()):
+        lines.append(name + "," + ",".join(str(stats[name][field]) for field in STAT_FIELDS))
+    return "\n".join(lines) + "\n"
+
+#read only view that still looks like the old notes[x][y][n] lists
+class CandidateNotesView:
+
+    def __init__(self, candidates, grid_length):
+        self.candidates = candidates
+        self.grid_length = grid_length
+
+    def __getitem__(self, x):
+        if x < 0 or x >= self.grid_length:
+            raise IndexError("row index out of range")
+        return CandidateRowView(self.candidates, x, self.grid_length)
+
+    def __len__(self):
+        return self.grid_length
+
+    def __iter__(self):
+        for x in range(self.grid_length):
+            yield self[x]
+
+#units are numbered rows first, then columns, then boxes
+UNIT_KINDS = ("row", "column", "box")
+
+#geometry only depends on box_size, so it is built once per size and shared by every grid
+GRID_GEOMETRIES = {}
+
+def GetGridGeometry(box_size):
+    if box_size in GRID_GEOMETRIES:
+        return GRID_GEOMETRIES[box_size]
+
+    grid_length = box_size ** 2
+    cell_count = grid_length ** 2
+
+    geometry = {"box_size" : box_size, "grid_length" : grid_length, "cell_count" : cell_count, "row_of" : [], "column_of" : [], "box_of" : [], "cell_units" : [], "units" : [], "unit_kinds" : [], "box_origins" : [], "unit_boxes" : [], "peers" : [], "peer_sets" : [], "common_peers" : {}}
+
+    for c in range(cell_count):
+        x = c // grid_length
+        y = c % grid_length
+        box = (x // box_size) * box_size + y // box_size
+        geometry["row_of"].append(x)
+        geometry["column_of"].append(y)
+        geometry["box_of"].append(box)
+        geometry["cell_units"].append((x, grid_length + y, 2 * grid_length + box))
+
+    for x in range(grid_length):
+        geometry["units"].append(tuple(x * grid_length + i for i in range(grid_length)))
+        geometry["unit_kinds"].append(UNIT_KINDS[0])
+
+    for y in range(grid_length):
+        geometry["units"].append(tuple(i * grid_length + y for i in range(grid_length)))
+        geometry["unit_kinds"].append(UNIT_KINDS[1])
+
+    for box in range(grid_length):
+        x_min = (box // box_size) * box_size
+        y_min = (box % box_size) * box_size
+        geometry["box_origins"].append((x_min, y_min))
+        geometry["units"].append(tuple(i * grid_length + j for i in range(x_min, x_min + box_size) for j in range(y_min, y_min + box_size)))
+        geometry["unit_kinds"].append(UNIT_KINDS[2])
+
+    for c in range(cell_count):
+        peers = []
+        for unit in geometry["cell_units"][c]:
+            for p in geometry["units"][unit]:
+                if p != c and p not in peers:
+                    peers.append(p)
+        geometry["peers"].append(tuple(peers))
+        geometry["peer_sets"].append(frozenset(peers))
+
+    #boxes a unit passes through, box techniques are run for all of them when a row or column changes
+    for unit in range(3 * grid_length):
+        boxes = []
+        for c in geometry["units"][unit]:
+            if geometry["box_of"][c] not in boxes:
+                boxes.append(geometry["box_of"][c])
+        geometry["unit_boxes"].append(tuple(boxes))
+
+    GRID_GEOMETRIES[box_size] = geometry
+    return geometry
+
+#cells that see both a and b, filled in lazily since most pairs are never asked for
+def GetCommonPeers(geometry, a, b):
+    if a > b:
+        a, b = b, a
+    key = a * geometry["cell_count"] + b
+    common = geometry["common_peers"].get(key)
+    if common is None:
+        common = tuple(sorted(geometry["peer_sets"][a] & geometry["peer_sets"][b]))
+        geometry["common_peers"][key] = common
+    return common
+
+#deductions already applied, so techniques don't redo them, keyed by technique, scope and a bit pattern
+#each entry holds the version of the units it was found in and is dropped once they change, the oldest entries go first when the memo is full
+MEMO_LIMIT = 4096
+MEMO_SETS = 0
+MEMO_POINTED_SETS = 1
+MEMO_RESTRICTED_SETS = 2
+
+#scope is a unit, box or cell id and always fits in 10 bits, even on 25x25
+def MemoKey(kind, scope, pattern):
+    return (((pattern << 10) | scope) << 3) | kind
+
+def IsMemoCurrent(grid, key, stamp):
+    memo = grid["memo"]
+    remembered = memo.get(key)
+    if remembered is None:
+        return False
+    if remembered != stamp:
+        del memo[key]
+        return False
+    memo.move_to_end(key)
+    return True
+
+def RememberMemo(grid, key, stamp):
+    memo = grid["memo"]
+    memo[key] = stamp
+    memo.move_to_end(key)
+    if len(memo) > grid["memo_limit"]:
+        memo.popitem(last=False)
+
+#keep_log=False turns the solution log off completely, nothing is recorded or built for it
+#strategy is the name of a profile in STRATEGIES or a list of tiers, see ResolveStrategy
+def CreateSudokuGrid(box_size, keep_log=True, memo_limit=MEMO_LIMIT, strategy="all"):
     try:
         box_size = int(box_size)
     except:
         return
 
-    grid = {"notes" : [], "solution" : [], "box_size" : box_size, "solution_log": [], "row_sets" : set(), "column_sets" : set(), "box_sets" : set(), "x_wings" : set(), "pointed_sets": set(), "box_restrictions" : set(), "y_wings": set()}
-
     size = box_size ** 2
 
+    grid = {"candidates" : [(1 << size) - 1] * (size * size), "solution" : [], "box_size" : box_size, "solution_log": [] if keep_log else None, "memo" : OrderedDict(), "memo_limit" : memo_limit, "stats" : None, "progress" : None, "scan_stamps" : {}, "candidate_version" : 0}
+    grid["notes"] = CandidateNotesView(grid["candidates"], size)
+    grid["geometry"] = GetGridGeometry(box_size)
+
+    #pending unit checks, one queue per strategy tier, a tier only gets a turn once every cheaper one has run dry
+    grid["strategy"] = ResolveStrategy(strategy)
+    grid["check_queues"] = [deque() for _ in grid["strategy"]]
+    grid["queued_units"] = [bytearray(3 * size) for _ in grid["strategy"]]
+    grid["propagating"] = False
+
+    #bumped whenever a cell in the unit loses candidates, techniques compare them against scan_stamps to skip unchanged units
+    grid["unit_versions"] = [0] * (3 * size)
+
+    #every change as a flat run of (cell, old candidates) pairs, placements store the cell as -1 - cell, see Checkpoint
+    grid["trail"] = []
+
+    #the cells with exactly two candidates left, filed under each of the two numbers and under their pair mask, see SetCandidates
+    grid["bivalue_cells"] = [set() for _ in range(size)]
+    grid["pair_cells"] = {}
+
     for _ in range(size):
-        note_row = []
-        solution_row = []
-        for _ in range(size):
-            col = []
-            for _ in range(size):
-                col.append(True)
-            note_row.append(col)
-            solution_row.append(0)
-        grid["notes"].append(note_row)
-        grid["solution"].append(solution_row)
-    
+        grid["solution"].append([0] * size)
+
     return grid
 
+#every candidate change goes through here so the trail and the bivalue index always agree with the candidates
+#placed marks the change as a placement, so Rollback empties the cell again
+def SetCandidates(grid, c, mask, placed = False):
+    old_mask = grid["candidates"][c]
+    grid["trail"].append(-1 - c if placed else c)
+    grid["trail"].append(old_mask)
+    grid["candidates"][c] = mask
+    IndexBivalueCell(grid, c, old_mask, mask)
+
+def IndexBivalueCell(grid, c, old_mask, mask):
+    bivalue_cells = grid["bivalue_cells"]
+    pair_cells = grid["pair_cells"]
+    if PopCount(old_mask) == 2:
+        for n in MaskToNumbers(old_mask):
+            bivalue_cells[n].discard(c)
+        pair_cells[old_mask].discard(c)
+        if len(pair_cells[old_mask]) == 0:
+            del pair_cells[old_mask]
+    if PopCount(mask) == 2:
+        for n in MaskToNumbers(mask):
+            bivalue_cells[n].add(c)
+        if mask in pair_cells:
+            pair_cells[mask].add(c)
+        else:
+            pair_cells[mask] = {c}
+
+#for candidates written all at once instead of through SetCandidates
+def RebuildBivalueIndex(grid):
+    for cells in grid["bivalue_cells"]:
+        cells.clear()
+    grid["pair_cells"].clear()
+    for c, mask in enumerate(grid["candidates"]):
+        IndexBivalueCell(grid, c, 0, mask)
+    return grid
+
+#marks the current state, O(1), hand the mark to Rollback to come back to it
+def Checkpoint(grid):
+    log = grid["solution_log"]
+    return (len(grid["trail"]), len(log) if isinstance(log, list) else None)
+
+#undoes every change made since the mark in reverse order, so the cost is only what changed since
+#the versions of the restored units are bumped so scans and memo entries made after the mark are not trusted
+def Rollback(grid, mark):
+    trail_length, log_length = mark
+    trail = grid["trail"]
+    candidates = grid["candidates"]
+    geometry = grid["geometry"]
+    versions = grid["unit_versions"]
+
+    while len(trail) > trail_length:
+        old_mask = trail.pop()
+        c = trail.pop()
+        if c < 0:
+            c = -1 - c
+            grid["solution"][geometry["row_of"][c]][geometry["column_of"][c]] = 0
+        IndexBivalueCell(grid, c, candidates[c], old_mask)
+        candidates[c] = old_mask
+        for unit in geometry["cell_units"][c]:
+            versions[unit] += 1
+        grid["candidate_version"] += 1
+
+    if log_length is not None:
+        del grid["solution_log"][log_length:]
+
+    return grid
+
+#a separate grid in the same state, the trail starts over since marks from the original mean nothing to the copy
+def CloneGrid(grid):
+    clone = dict(grid)
+    clone["candidates"] = list(grid["candidates"])
+    clone["notes"] = CandidateNotesView(clone["candidates"], grid["geometry"]["grid_length"])
+    clone["solution"] = [list(row) for row in grid["solution"]]
+    clone["memo"] = OrderedDict(grid["memo"])
+    clone["scan_stamps"] = dict(grid["scan_stamps"])
+    clone["unit_versions"] = list(grid["unit_versions"])
+    clone["check_queues"] = [deque(queue) for queue in grid["check_queues"]]
+    clone["queued_units"] = [bytearray(queued) for queued in grid["queued_units"]]
+    clone["propagating"] = False
+    clone["trail"] = []
+    clone["bivalue_cells"] = [set(cells) for cells in grid["bivalue_cells"]]
+    clone["pair_cells"] = {mask : set(cells) for mask, cells in grid["pair_cells"].items()}
+    if isinstance(grid["solution_log"], list):
+        clone["solution_log"] = list(grid["solution_log"])
+    if grid["stats"] is not None:
+        clone["stats"] = {"techniques" : {name : dict(counters) for name, counters in grid["stats"]["techniques"].items()}, "cells_scanned" : grid["stats"]["cells_scanned"], "eliminations" : grid["stats"]["eliminations"], "placements" : grid["stats"]["placements"]}
+    return clone
+
 def PlaceNumber(grid, number, x, y):
     
     try:
@@ -57,1227 +504,758 @@ def PlaceNumber(grid, number, x, y):
     if grid["solution"][x][y] != 0:
         if grid["solution"][x][y] != number:
             error = "Two different solutions for the same square solution 1: " + str(grid["solution"][x][y]) + " solution 2: " + str(number) + " x: " + str(x) + " y: " + str(y)
-            raise Exception(error)
+            raise SolveContradiction(error)
         else:
             return grid
     
     grid["solution"][x][y] = number
-    grid["solution_log"].append("Placing number: " + str(number) + " at row: " + str(x) + " col: " + str(y))
+    if grid["stats"] is not None:
+        grid["stats"]["placements"] += 1
+    if grid["solution_log"] is not None:
+        grid["solution_log"].append((LOG_PLACE, number, (x * grid_length + y,)))
 
-    for i in range(grid_length):
-        grid["notes"][x][y][i] = False
+    SetCandidates(grid, x * grid_length + y, 0, True)
     
+    QueuePointChecks(grid, x, y)
+
     grid = RemovePossibleFromRow(grid, number, x)
     grid = RemovePossibleFromColumn(grid, number, y)
     grid = RemovePossibleFromBox(grid, number, x, y)
-    
-    for i in range(grid_length):
-        grid = PerformPointChecks(grid, x, i)
-        grid = PerformPointChecks(grid, i, y)
 
+    return PropagateChecks(grid)
+
+#places a whole puzzle at once, every given is checked first, the peers are cleared in one pass and only then do the techniques start
+#cells the grid already has solved count as givens, a given that disagrees with one is an error like it is in PlaceNumber
+def LoadGivens(grid, puzzle):
+    geometry = grid["geometry"]
+    grid_length = geometry["grid_length"]
+    row_of = geometry["row_of"]
+    column_of = geometry["column_of"]
+    cell_units = geometry["cell_units"]
+    solution = grid["solution"]
+    candidates = grid["candidates"]
+
+    if len(puzzle) != grid_length or any(len(row) != grid_length for row in puzzle):
+        error = "puzzle is not " + str(grid_length) + "x" + str(grid_length)
+        raise Exception(error)
+
+    #numbers already used in each unit
+    used = [0] * (3 * grid_length)
+    givens = []
+    for c in range(geometry["cell_count"]):
+        x = row_of[c]
+        y = column_of[c]
+        number = int(puzzle[x][y])
+        if number == 0:
+            number = solution[x][y]
+            if number == 0:
+                continue
+        elif number < 0 or number > grid_length:
+            error = "trying to place a number larger than the grid size number: " + str(number) + " grid_length: " + str(grid_length)
+            raise Exception(error)
+        elif solution[x][y] == 0:
+            givens.append((c, number))
+        elif solution[x][y] != number:
+            error = "Two different solutions for the same square solution 1: " + str(solution[x][y]) + " solution 2: " + str(number) + " x: " + str(x) + " y: " + str(y)
+            raise SolveContradiction(error)
+
+        bit = 1 << (number - 1)
+        for unit in cell_units[c]:
+            if used[unit] & bit:
+                error = "Number placed twice in one unit number: " + str(number) + " x: " + str(x) + " y: " + str(y)
+                raise Exception(error)
+            used[unit] |= bit
+
+    log = grid["solution_log"]
+    for c, number in givens:
+        solution[row_of[c]][column_of[c]] = number
+        if log is not None:
+            log.append((LOG_PLACE, number, (c,)))
+        SetCandidates(grid, c, 0, True)
+        QueueCellChecks(grid, c)
+    if grid["stats"] is not None:
+        grid["stats"]["placements"] += len(givens)
+
+    #every empty cell loses whatever its row, column and box already have
+    removed = []
+    for c in range(geometry["cell_count"]):
+        units = cell_units[c]
+        mask = candidates[c] & (used[units[0]] | used[units[1]] | used[units[2]])
+        if mask:
+            removed.append((c, mask))
+
+    if grid["stats"] is not None:
+        grid["stats"]["eliminations"] += sum(PopCount(mask) for c, mask in removed)
+    if log is not None:
+        for n in range(grid_length):
+            cells = tuple(c for c, mask in removed if mask >> n & 1)
+            if len(cells) > 0:
+                log.append((LOG_ELIMINATE, n + 1, cells))
+
+    for c, mask in removed:
+        SetCandidates(grid, c, candidates[c] & ~mask)
+        QueueCellChecks(grid, c)
+
+    return PropagateChecks(grid)
+
+#every candidate removal goes through here, the event that caused it is logged first and only if something changed
+def RemoveCandidates(grid, cells, mask, event = None):
+    candidates = grid["candidates"]
+    changed = [c for c in cells if candidates[c] & mask]
+    if len(changed) == 0:
+        return changed
+
+    if grid["stats"] is not None:
+        grid["stats"]["eliminations"] += sum(PopCount(candidates[c] & mask) for c in changed)
+
+    log = grid["solution_log"]
+    if log is not None:
+        if event is not None:
+            log.append(event)
+        for n in MaskToNumbers(mask):
+            bit = 1 << n
+            removed = tuple(c for c in changed if candidates[c] & bit)
+            if len(removed) > 0:
+                log.append((LOG_ELIMINATE, n + 1, removed))
+
+    for c in changed:
+        SetCandidates(grid, c, candidates[c] & ~mask)
+        QueueCellChecks(grid, c)
+
+    return changed
+
+def RemovePossibleFromUnit(grid, number, unit):
+    RemoveCandidates(grid, grid["geometry"]["units"][unit], 1 << (number - 1))
     return grid
 
 def RemovePossibleFromRow(grid, number, x):
-    grid_length = grid["box_size"] ** 2
-    for i in range(grid_length):
-        if grid["notes"][x][i][number - 1]:
-            grid["solution_log"].append("Removing possible " + str(number) + " from row: " + str(x) + " column: " + str(i))
-            grid["notes"][x][i][number - 1] = False
-    return grid
+    return RemovePossibleFromUnit(grid, number, x)
 
 def RemovePossibleFromColumn(grid, number, y):
-    grid_length = grid["box_size"] ** 2
-    for i in range(grid_length):
-        if grid["notes"][i][y][number - 1]:
-            grid["solution_log"].append("Removing possible " + str(number) + " from row: " + str(i) + " column: " + str(y))
-            grid["notes"][i][y][number - 1] = False
-    return grid
+    return RemovePossibleFromUnit(grid, number, grid["geometry"]["grid_length"] + y)
 
 def RemovePossibleFromBox(grid, number, x, y):
-    x_box = math.ceil((x+1)/grid["box_size"])
-    y_box = math.ceil((y+1)/grid["box_size"])
-
-    x_min = grid["box_size"] * (x_box - 1)
-    y_min = grid["box_size"] * (y_box - 1)
-
-    num_removed = 0
-    for i in range(x_min, x_min + grid["box_size"]):
-        for j in range(y_min, y_min + grid["box_size"]):
-            if grid["notes"][i][j][number - 1]:
-                num_removed += 1
-                grid["solution_log"].append("Removing possible " + str(number) + " from row: " + str(i) + " col: " + str(j))
-                grid["notes"][i][j][number - 1] = False
-    
-    if num_removed > 0:
-        for i in range(x_min, x_min + grid["box_size"]):
-            for j in range(y_min, y_min + grid["box_size"]):
-                grid = PerformPointChecks(grid, i, j)
-    
-    return grid
-
-def RemovePossibleFromSharedSquares(grid, number, p1, p2, exclusions = []):
-
-    changed = set()
-
-    p1_x_box = math.ceil((p1[0]+1)/grid["box_size"])
-    p1_y_box = math.ceil((p1[1]+1)/grid["box_size"])
+    geometry = grid["geometry"]
+    return RemovePossibleFromUnit(grid, number, geometry["cell_units"][x * geometry["grid_length"] + y][2])
+
+#called every time a cell's candidates change
+def QueueCellChecks(grid, c):
+    units = grid["geometry"]["cell_units"][c]
+    versions = grid["unit_versions"]
+    for unit in units:
+        versions[unit] += 1
+    grid["candidate_version"] += 1
+    for queue, queued in zip(grid["check_queues"], grid["queued_units"]):
+        for unit in units:
+            if not queued[unit]:
+                queued[unit] = 1
+                queue.append(unit)
+
+def QueuePointChecks(grid, x, y):
+    QueueCellChecks(grid, x * grid["geometry"]["grid_length"] + y)
+
+#true when a technique already ran on exactly these inputs, otherwise the new stamp is remembered and the scan goes ahead
+def IsScanCurrent(grid, key, stamp):
+    stamps = grid["scan_stamps"]
+    if stamps.get(key) == stamp:
+        return True
+    stamps[key] = stamp
+    return False
+
+def QueueAllUnits(grid):
+    for queue, queued in zip(grid["check_queues"], grid["queued_units"]):
+        for unit in range(len(queued)):
+            if not queued[unit]:
+                queued[unit] = 1
+                queue.append(unit)
+
+def PerformUnitChecks(grid, tier, unit):
+    geometry = grid["geometry"]
+
+    for name in grid["strategy"][tier]:
+        technique, scope = TECHNIQUES[name]
+        if scope == "unit":
+            grid = CallTechnique(grid, technique, unit)
+        elif scope == "box":
+            for box in geometry["unit_boxes"][unit]:
+                x_min, y_min = geometry["box_origins"][box]
+                grid = CallTechnique(grid, technique, x_min, y_min)
+        elif scope == "number":
+            for n in range(geometry["grid_length"]):
+                grid = CallTechnique(grid, technique, n)
+        elif scope == "grid":
+            grid = CallTechnique(grid, technique)
 
-    p1_x_min = grid["box_size"] * (p1_x_box - 1)
-    p1_y_min = grid["box_size"] * (p1_y_box - 1)
+    return grid
 
-    p2_x_box = math.ceil((p2[0]+1)/grid["box_size"])
-    p2_y_box = math.ceil((p2[1]+1)/grid["box_size"])
+def PerformNextCheck(grid):
+    for tier in range(len(grid["check_queues"])):
+        queue = grid["check_queues"][tier]
+        if len(queue) > 0:
+            unit = queue.popleft()
+            grid["queued_units"][tier][unit] = 0
+            PerformUnitChecks(grid, tier, unit)
+            return True
+    return False
+
+#drains the queued units until nothing changes anymore, checks that happen while draining only add to the queue
+def PropagateChecks(grid):
+    if grid["propagating"]:
+        return grid
 
-    p2_x_min = grid["box_size"] * (p2_x_box - 1)
-    p2_y_min = grid["box_size"] * (p2_y_box - 1)
+    grid["propagating"] = True
+    try:
+        while PerformNextCheck(grid):
+            pass
+    finally:
+        grid["propagating"] = False
 
-    crossover_points = set()
+    return grid
 
-    crossover_points.add((p1[0], p2[1]))
-    crossover_points.add((p2[0], p1[1]))
+#stands in for the log while IterSteps runs, events wait here until they are handed out and still reach the real log
+class StepBuffer:
 
-    if p1[0] >= p2_x_min and p1[0] < p2_x_min + grid["box_size"]:
-        for i in range(p2_y_min, p2_y_min + grid["box_size"]):
-            crossover_points.add((p1[0], i))
-    
-    if p1[1] >= p2_y_min and p1[1] < p2_y_min + grid["box_size"]:
-        for i in range(p2_x_min, p2_x_min + grid["box_size"]):
-            crossover_points.add((i, p1[1]))
+    def __init__(self, log):
+        self.events = deque()
+        self.log = log
 
-    if p2[0] >= p1_x_min and p2[0] < p1_x_min + grid["box_size"]:
-        for i in range(p1_y_min, p1_y_min + grid["box_size"]):
-            crossover_points.add((p2[0], i))
-    
-    if p2[1] >= p1_y_min and p2[1] < p1_y_min + grid["box_size"]:
-        for i in range(p1_x_min, p1_x_min + grid["box_size"]):
-            crossover_points.add((i, p2[1]))
-
-    for e in exclusions:
-        if e in crossover_points:
-            crossover_points.remove(e)
-
-    for p in crossover_points:
-        if grid["notes"][p[0]][p[1]][number]:
-            grid["solution_log"].append("Removing possible " + str(number + 1) + " from row: " + str(p[0]) + " column: " + str(p[1]))
-            grid["notes"][p[0]][p[1]][number] = False
-            changed.add(p)
-
-    if len(changed) > 0:
-        for p in changed:
-            grid = PerformPointChecks(grid, p[0], p[1])
-
-    return grid, changed
-
-def PerformBasicRowChecks(grid, x):
-    grid = CheckRowForOnlyOptions(grid, x)
-    grid = CheckRowForOnlyPositions(grid, x)
-    grid = CheckRowForSets(grid, x)
-    for i in range(grid["box_size"]):
-        y = i * grid["box_size"]
-        grid = CheckBoxForPointedSets(grid, x, y)
-        grid = CheckBoxForRowOrColumnRestrictedSets(grid, x, y)
-    return grid
+    def append(self, event):
+        self.events.append(event)
+        if self.log is not None:
+            self.log.append(event)
 
-def PerformBasicColumnChecks(grid, y):
-    grid = CheckColumnForOnlyOptions(grid, y)
-    grid = CheckColumnForOnlyPositions(grid, y)
-    grid = CheckColumnForSets(grid, y)
-    for i in range(grid["box_size"]):
-        x = i * grid["box_size"]
-        grid = CheckBoxForPointedSets(grid, x, y)
-        grid = CheckBoxForRowOrColumnRestrictedSets(grid, x, y)
-    return grid
+#yields the events of solving the puzzle on grid one at a time, the techniques only run as the events are asked for
+#between steps the grid holds every deduction made so far, stopping early leaves the rest queued and PropagateChecks picks it up
+def IterSteps(grid, puzzle=None):
+    log = grid["solution_log"]
+    buffer = StepBuffer(log)
+    propagating = grid["propagating"]
+    grid["solution_log"] = buffer
+    #held so every placement only queues its checks instead of running them
+    grid["propagating"] = True
 
-def PerformBasicBoxChecks(grid, x, y):
-    grid = CheckBoxForOnlyOptions(grid, x, y)
-    grid = CheckBoxForOnlyPositions(grid, x, y)
-    grid = CheckBoxForSets(grid, x, y)
-    grid = CheckBoxForPointedSets(grid, x, y)
-    grid = CheckBoxForRowOrColumnRestrictedSets(grid, x, y)
-    return grid
+    try:
+        if puzzle is not None:
+            LoadGivens(grid, puzzle)
+        while True:
+            while len(buffer.events) > 0:
+                yield buffer.events.popleft()
+            if not PerformNextCheck(grid):
+                break
+    finally:
+        grid["solution_log"] = log
+        grid["propagating"] = propagating
 
-def PerformBasicPointChecks(grid, x, y):
-    grid = PerformBasicRowChecks(grid, x)
-    grid = PerformBasicColumnChecks(grid, y)
-    grid = PerformBasicBoxChecks(grid, x, y)
-    return grid
+def PerformPointChecks(grid, x, y):
+    QueuePointChecks(grid, x, y)
+    return PropagateChecks(grid)
+
+#size of the keys whose masks fit in size bits between them, keys are tried in order and a branch is dropped as soon as its union is too wide
+#the cells of a naked set and the base lines of a fish are both found this way
+def FindCoveringSets(masks, keys, size, first = 0, chosen = (), union = 0):
+    if len(chosen) == size:
+        if PopCount(union) == size:
+            yield chosen, union
+        return
+    for i in range(first, len(keys) - (size - len(chosen)) + 1):
+        combined = union | masks[keys[i]]
+        if PopCount(combined) <= size:
+            yield from FindCoveringSets(masks, keys, size, i + 1, chosen + (keys[i],), combined)
+
+def CheckUnitForOnlyOptions(grid, unit):
+    geometry = grid["geometry"]
+    candidates = grid["candidates"]
+    if IsScanCurrent(grid, ("only_options", unit), grid["unit_versions"][unit]):
+        return grid
+    if grid["stats"] is not None:
+        grid["stats"]["cells_scanned"] += len(geometry["units"][unit])
 
-def PerformAdvancedRowChecks(grid, y):
-    for i in range(grid["box_size"] ** 2):
-        grid = CheckPointForXWings(grid, i, y)
-        grid = CheckPointForYWings(grid, i, y)
-        grid = CheckPointForXYChains(grid, i, y)
-    return grid
+    for c in geometry["units"][unit]:
+        mask = candidates[c]
 
-def PerformAdvancedColumnChecks(grid, x):
-    for i in range(grid["box_size"] ** 2):
-        grid = CheckPointForXWings(grid, x, i)
-        grid = CheckPointForYWings(grid, x, i)
-        grid = CheckPointForXYChains(grid, x, i)
-    return grid
+        if PopCount(mask) == 1:
+            true_number = LowestBit(mask) + 1
+            x = geometry["row_of"][c]
+            y = geometry["column_of"][c]
+            if grid["solution_log"] is not None:
+                grid["solution_log"].append((TECHNIQUE_ONLY_OPTION, true_number, (c,)))
+            grid = PlaceNumber(grid, true_number, x, y)
 
-def PerformAdvancedPointChecks(grid, x, y):
-    grid = PerformAdvancedRowChecks(grid, x)
-    grid = PerformAdvancedColumnChecks(grid, y)
-    return grid
-
-def PerformPointChecks(grid, x, y):
-    grid = PerformBasicPointChecks(grid, x, y)
-    grid = PerformAdvancedPointChecks(grid, x, y)
     return grid
 
 def CheckRowForOnlyOptions(grid, x):
-        
-    grid_length = len(grid["solution"])
-
-    for i in range(grid_length):
-        if grid["solution"][x][i] != 0:
-            continue
-        num_true = 0
-        true_number = 0
-        for j in range(grid_length):
-            if grid["notes"][x][i][j]:
-                num_true += 1
-                true_number = j + 1
-        
-        if num_true == 1:
-            grid["solution_log"].append("Only row option left number: " + str(true_number) + " at row: " + str(x) + " col: " + str(i))
-            grid = PlaceNumber(grid, true_number, x, i)
-    
-    return grid
+    return CheckUnitForOnlyOptions(grid, x)
 
 def CheckColumnForOnlyOptions(grid, y):
-    grid_length = len(grid["solution"])
-
-    for i in range(grid_length):
-        if grid["solution"][i][y] != 0:
-            continue
-        num_true = 0
-        true_number = 0
-        for j in range(grid_length):
-            if grid["notes"][i][y][j]:
-                num_true += 1
-                true_number = j + 1
-        
-        if num_true == 1:
-            grid["solution_log"].append("Only column option left number: " + str(true_number) + " at row: " + str(i) + " col: " + str(y))
-            grid = PlaceNumber(grid, true_number, i, y)
-    
-    return grid
+    return CheckUnitForOnlyOptions(grid, grid["geometry"]["grid_length"] + y)
 
 def CheckBoxForOnlyOptions(grid, x, y):
+    geometry = grid["geometry"]
+    return CheckUnitForOnlyOptions(grid, geometry["cell_units"][x * geometry["grid_length"] + y][2])
+
+def CheckUnitForOnlyPositions(grid, unit):
+    geometry = grid["geometry"]
+    candidates = grid["candidates"]
+    cells = geometry["units"][unit]
+    if IsScanCurrent(grid, ("only_positions", unit), grid["unit_versions"][unit]):
+        return grid
+    if grid["stats"] is not None:
+        grid["stats"]["cells_scanned"] += len(cells)
+
+    seen_once = 0
+    seen_more = 0
+    for c in cells:
+        mask = candidates[c]
+        seen_more |= seen_once & mask
+        seen_once |= mask
+
+    positions = []
+    for n in MaskToNumbers(seen_once & ~seen_more):
+        bit = 1 << n
+        for c in cells:
+            if candidates[c] & bit:
+                positions.append((n, c))
+                break
+
+    for n, c in positions:
+        x = geometry["row_of"][c]
+        y = geometry["column_of"][c]
+        if grid["solution_log"] is not None:
+            grid["solution_log"].append((TECHNIQUE_ONLY_POSITION, n+1, (c,)))
+        grid = PlaceNumber(grid, n+1, x, y)
 
-    x_box = math.ceil((x+1)/grid["box_size"])
-    y_box = math.ceil((y+1)/grid["box_size"])
-
-    x_min = grid["box_size"] * (x_box - 1)
-    y_min = grid["box_size"] * (y_box - 1)
-
-    grid_length = len(grid["solution"])
-
-    for i in range(x_min, x_min + grid["box_size"]):
-        for j in range(y_min, y_min + grid["box_size"]):
-            if grid["solution"][i][j] != 0:
-                continue
-            num_true = 0
-            true_number = 0
-            for k in range(grid_length):
-                if grid["notes"][i][j][k]:
-                    num_true += 1
-                    true_number = k + 1
-            
-            if num_true == 1:
-                grid["solution_log"].append("Only box option left number: " + str(true_number) + " at row: " + str(i) + " col: " + str(j))
-                grid = PlaceNumber(grid, true_number, i, j)
     return grid
 
 def CheckRowForOnlyPositions(grid, x):
-    grid_length = len(grid["solution"])
-    numbers = []
-    for i in range(grid_length):
-        numbers.append(-1)
-
-    for i in range(grid_length):
-        for j in range(grid_length):
-            if grid["notes"][x][i][j]:
-                if numbers[j] > -1:
-                    numbers[j] = -2
-                else:
-                    if numbers[j] > -2:
-                        numbers[j] = i
-            
-
-    for i in range(len(numbers)):
-        if numbers[i] >= 0:
-            grid["solution_log"].append("Only row position left number: " + str(i+1) + " at row: " + str(x) + " col: " + str(numbers[i]))
-            grid = PlaceNumber(grid, i+1, x, numbers[i])
-    
-    return grid
+    return CheckUnitForOnlyPositions(grid, x)
 
 def CheckColumnForOnlyPositions(grid, y):
-    grid_length = len(grid["solution"])
-    numbers = []
-    for i in range(grid_length):
-        numbers.append(-1)
-
-    for i in range(grid_length):
-        for j in range(grid_length):
-            if grid["notes"][i][y][j]:
-                if numbers[j] > -1:
-                    numbers[j] = -2
-                else:
-                    if numbers[j] > -2:
-                        numbers[j] = i
-
-    for i in range(len(numbers)):
-        if numbers[i] >= 0:
-            grid["solution_log"].append("Only row position left number: " + str(i+1) + " at row: " + str(numbers[i]) + " col: " + str(y))
-            grid = PlaceNumber(grid, i+1, numbers[i], y)
-    
-    return grid
+    return CheckUnitForOnlyPositions(grid, grid["geometry"]["grid_length"] + y)
 
 def CheckBoxForOnlyPositions(grid, x, y):
-    x_box = math.ceil((x+1)/grid["box_size"])
-    y_box = math.ceil((y+1)/grid["box_size"])
-
-    x_min = grid["box_size"] * (x_box - 1)
-    y_min = grid["box_size"] * (y_box - 1)
-
-    grid_length = len(grid["solution"])
-
-    numbers = []
-    for i in range(grid_length):
-        numbers.append(None)
-
-    for i in range(x_min, x_min + grid["box_size"]):
-        for j in range(y_min, y_min + grid["box_size"]):
-            for k in range(grid_length):
-                if grid["notes"][i][j][k]:
-                    if numbers[k] != None:
-                        numbers[k] = -1
-                    else:
-                        if numbers[k] != -1:
-                            numbers[k] = (i,j)
-
-    for i in range(len(numbers)):
-        if numbers[i] != None and numbers[i] != -1:
-            grid["solution_log"].append("Only box position left number: " + str(i+1) + " at row: " + str(numbers[i][0]) + " col: " + str(numbers[i][1]))
-            grid = PlaceNumber(grid, i+1, numbers[i][0], numbers[i][1])
-    
-    return grid
-
-def CheckRowForSets(grid, x):
-    sets = {}
-
-    grid_length = len(grid["solution"])
-
-    useful_set_length = grid_length - 1
-
-    for i in range(grid_length):
-        if grid["solution"][x][i] > 0:
-            useful_set_length -= 1
-            continue
-
-        num_set = set()
-
-        for n in range(grid_length):
-            if grid["notes"][x][i][n]:
-                num_set.add(n)
-
-        num_set = frozenset(num_set)
-
-        if (x, num_set) in grid["row_sets"]:
-            continue
-            
-        if len(num_set) > useful_set_length:
-            continue
-        else:
-            if num_set in sets:
-                sets[num_set].add(i)
-            else:
-                sets[num_set] = set()
-
-            for key in sets.keys():
-                if num_set.issubset(key):
-                    sets[key].add(i)
-                if key.issubset(num_set):
-                    for c in sets[key]:
-                        sets[num_set].add(c)
-    
-    changed = set()
-
-    for num_set in sets.keys():
-        if len(sets[num_set]) > useful_set_length:
-            continue
-
-        if len(num_set) > len(sets[num_set]):
-            continue
-        
-        grid["row_sets"].add((x, num_set))
-
-        grid["solution_log"].append("found row solution set for row: " + str(x) + " set: " + str({num + 1 for num in num_set}))
-
-        num_changed = 0;
-        for c in range(grid_length):
-            if c not in sets[num_set]:
-                for n in num_set:
-                    if grid["notes"][x][c][n]:
-                        num_changed += 1
-                        changed.add((x,c))
-                        grid["solution_log"].append("row solution set removed: " + str(n + 1) + " at row: " + str(x) + " col: " + str(c))
-                        grid["notes"][x][c][n] = False
-        
-        if num_changed == 0:
-            grid["solution_log"].pop()
-
-    if len(changed) > 0:
-        for p in changed:
-            grid = PerformPointChecks(grid, p[0], p[1])
-
-    return grid
-
-def CheckColumnForSets(grid, y):
-    sets = {}
-
-    grid_length = len(grid["solution"])
-
-    useful_set_length = grid_length - 1
-
-    for i in range(grid_length):
-        if grid["solution"][i][y] > 0:
-            useful_set_length -= 1
-            continue
-
-        num_set = set()
-
-        for n in range(grid_length):
-            if grid["notes"][i][y][n]:
-                num_set.add(n)
-
-        num_set = frozenset(num_set)
-
-        if (y, num_set) in grid["column_sets"]:
-            continue
-            
-        if len(num_set) > useful_set_length:
-            continue
-        else:
-            if num_set in sets:
-                sets[num_set].add(i)
-            else:
-                sets[num_set] = set()
-
-            for key in sets.keys():
-                if num_set.issubset(key):
-                    sets[key].add(i)
-                if key.issubset(num_set):
-                    for c in sets[key]:
-                        sets[num_set].add(c)
-    
-    changed = set()
+    geometry = grid["geometry"]
+    return CheckUnitForOnlyPositions(grid, geometry["cell_units"][x * geometry["grid_length"] + y][2])
+
+#naked sets are searched up to this many cells, pairs, triples and quads
+SET_SIZE_LIMIT = 4
+
+#cells whose candidates fit in as many numbers between them, found with the same cover search as the fish
+def CheckUnitForSets(grid, unit):
+    geometry = grid["geometry"]
+    candidates = grid["candidates"]
+    cells = geometry["units"][unit]
+    versions = grid["unit_versions"]
+    if IsScanCurrent(grid, ("sets", unit), grid["unit_versions"][unit]):
+        return grid
+    if grid["stats"] is not None:
+        grid["stats"]["cells_scanned"] += len(cells)
 
-    for num_set in sets.keys():
-        if len(sets[num_set]) > useful_set_length:
-            continue
+    #a set of every open cell in the unit says nothing
+    open_cells = [c for c in cells if candidates[c]]
 
-        if len(num_set) > len(sets[num_set]):
+    for size in range(2, min(SET_SIZE_LIMIT, len(open_cells) - 1) + 1):
+        fitting = [c for c in open_cells if PopCount(candidates[c]) <= size]
+        if len(fitting) < size:
             continue
-        
-        grid["column_sets"].add((y, num_set))
-        grid["solution_log"].append("found column solution set for collumn: " + str(y) + " set: " + str({num + 1 for num in num_set}))
-        
-        num_changed = 0
-        for r in range(grid_length):
-            if r not in sets[num_set]:
-                for n in num_set:
-                    if grid["notes"][r][y][n]:
-                        num_changed += 1
-                        changed.add((r,y))
-                        grid["solution_log"].append("row solution set removed: " + str(n + 1) + " at row: " + str(r) + " col: " + str(y))
-                        grid["notes"][r][y][n] = False
-
-        if num_changed == 0:
-            grid["solution_log"].pop()
-    
-    if len(changed) > 0:
-        for p in changed:
-            grid = PerformPointChecks(grid, p[0], p[1])
-
-    return grid
-
-def CheckBoxForSets(grid, x, y):
-
-    x_box = math.ceil((x+1)/grid["box_size"])
-    y_box = math.ceil((y+1)/grid["box_size"])
-
-    x_min = grid["box_size"] * (x_box - 1)
-    y_min = grid["box_size"] * (y_box - 1)
-
-    sets = {}
-
-    grid_length = len(grid["solution"])
-
-    useful_set_length = grid_length - 1
-
-    for i in range(x_min, x_min + grid["box_size"]):
-        for j in range(y_min, y_min + grid["box_size"]):
-            if grid["solution"][i][j] > 0:
-                useful_set_length -= 1
+        for members, num_set in FindCoveringSets(candidates, fitting, size):
+            if IsMemoCurrent(grid, MemoKey(MEMO_SETS, unit, num_set), versions[unit]):
                 continue
-
-            num_set = set()
-
-            for n in range(grid_length):
-                if grid["notes"][i][j][n]:
-                    num_set.add(n)
-
-            num_set = frozenset(num_set)
-
-            if ((x_box, y_box), num_set) in grid["box_sets"]:
-                continue
-                
-            if len(num_set) > useful_set_length:
-                continue
-            else:
-                if num_set in sets:
-                    sets[num_set].add((i,j))
-                else:
-                    sets[num_set] = set()
-
-                for key in sets.keys():
-                    if num_set.issubset(key):
-                        sets[key].add((i,j))
-                    if key.issubset(num_set):
-                        for c in sets[key]:
-                            sets[num_set].add(c)
-    
-    changed = set()
-
-    for num_set in sets.keys():
-        if len(sets[num_set]) > useful_set_length:
-            continue
-
-        if len(num_set) > len(sets[num_set]):
-            continue
-        
-        grid["box_sets"].add(((x_box, y_box), num_set))
-        grid["solution_log"].append("found box solution set for box at x: " + str(x) + " y: " + str(y) + " set: " + str({num + 1 for num in num_set}))
-
-        num_changed = 0
-        for i in range(x_min, x_min + grid["box_size"]):
-            for j in range(y_min, y_min + grid["box_size"]):
-                if (i,j) not in sets[num_set]:
-                    for n in num_set:
-                        if grid["notes"][i][j][n]:
-                            num_changed += 1
-                            changed.add((i,j))
-                            grid["solution_log"].append("box solution set removed: " + str(n + 1) + " at row: " + str(i) + " col: " + str(j))
-                            grid["notes"][i][j][n] = False
-
-        if num_changed == 0:
-            grid["solution_log"].pop()
-    
-    if len(changed) > 0:
-        for p in changed:
-            grid = PerformPointChecks(grid, p[0], p[1])
+            RemoveCandidates(grid, [c for c in cells if c not in members], num_set, (TECHNIQUE_SOLUTION_SET, num_set, members))
+            RememberMemo(grid, MemoKey(MEMO_SETS, unit, num_set), versions[unit])
 
     return grid
 
 def CheckBoxForPointedSets(grid, x, y):
-    x_box = math.ceil((x+1)/grid["box_size"])
-    y_box = math.ceil((y+1)/grid["box_size"])
-
-    x_min = grid["box_size"] * (x_box - 1)
-    y_min = grid["box_size"] * (y_box - 1)
+    geometry = grid["geometry"]
+    box_size = geometry["box_size"]
+    grid_length = geometry["grid_length"]
+    candidates = grid["candidates"]
+
+    box = geometry["box_of"][x * grid_length + y]
+    x_min, y_min = geometry["box_origins"][box]
+    if IsScanCurrent(grid, ("pointed_sets", box), grid["unit_versions"][2 * grid_length + box]):
+        return grid
+    if grid["stats"] is not None:
+        grid["stats"]["cells_scanned"] += grid_length
 
     number_counts = {}
+    box_version = grid["unit_versions"][2 * grid_length + box]
 
-    grid_length = len(grid["solution"])
-
-    changed = set()
-
-    for i in range(x_min, x_min + grid["box_size"]):
-        for j in range(y_min, y_min + grid["box_size"]):
-            if grid["solution"][i][j] > 0:
-                continue
-            for k in range(grid_length):
-                if grid["notes"][i][j][k] and ((x_box, y_box), k) not in grid["pointed_sets"]:
-                    if k in number_counts.keys():
-                        number_counts[k].add((i,j))
-                    else:
-                        number_counts[k] = set()
-                        number_counts[k].add((i,j))
-
+    for c in geometry["units"][2 * grid_length + box]:
+        for k in MaskToNumbers(candidates[c]):
+            if not IsMemoCurrent(grid, MemoKey(MEMO_POINTED_SETS, box, k), box_version):
+                if k in number_counts.keys():
+                    number_counts[k].append(c)
+                else:
+                    number_counts[k] = [c]
 
     for key in number_counts.keys():
         if len(number_counts[key]) <= 3:
             points = number_counts[key]
-            firstRow = next(iter(points))[0]
-            firstColumn = next(iter(points))[1]
+            firstRow = geometry["row_of"][points[0]]
+            firstColumn = geometry["column_of"][points[0]]
             isPointedRow = True
             isPointedColumn = True
             for p in points:
-                if p[0] != firstRow:
+                if geometry["row_of"][p] != firstRow:
                     isPointedRow = False
-                if p[1] != firstColumn:
+                if geometry["column_of"][p] != firstColumn:
                     isPointedColumn = False
 
+            bit = 1 << key
+            event = (TECHNIQUE_POINTED_SET, key + 1, tuple(points))
+
+            #removing from the line outside the box leaves the box version alone
             if isPointedRow:
-                grid["solution_log"].append("found pointed row set for box at x: " + str(x) + " y: " + str(y) + " for number: " + str(key + 1))
-                grid["pointed_sets"].add(((x_box, y_box), key))
-                num_changed = 0
-                for i in range(grid_length):
-                    if i < y_min or i >= y_min + grid["box_size"]:
-                        if grid["notes"][firstRow][i][key]:
-                            num_changed += 1
-                            grid["solution_log"].append("pointed row set removed: " + str(key + 1) + " at row: " + str(firstRow) + " col: " + str(i))
-                            grid["notes"][firstRow][i][key] = False
-                            changed.add((firstRow, i))
-                
-                if num_changed == 0:
-                    grid["solution_log"].pop()
-            
+                RememberMemo(grid, MemoKey(MEMO_POINTED_SETS, box, key), box_version)
+                RemoveCandidates(grid, [c for c in geometry["units"][firstRow] if geometry["column_of"][c] < y_min or geometry["column_of"][c] >= y_min + box_size], bit, event)
+
             if isPointedColumn:
-                grid["solution_log"].append("found pointed column set for box at x: " + str(x) + " y: " + str(y) + " for number: " + str(key + 1))
-                grid["pointed_sets"].add(((x_box, y_box), key))
-                num_changed = 0
-                for i in range(grid_length):
-                    if i < x_min or i >= x_min + grid["box_size"]:
-                        if grid["notes"][i][firstColumn][key]:
-                            num_changed += 1
-                            grid["solution_log"].append("pointed column set removed: " + str(key + 1) + " at row: " + str(i) + " col: " + str(firstColumn))
-                            grid["notes"][i][firstColumn][key] = False
-                            changed.add((i, firstColumn))
-                if num_changed == 0:
-                    grid["solution_log"].pop()
-    
-    if len(changed) > 0:
-        for p in changed:
-            grid = PerformPointChecks(grid, p[0], p[1])
+                RememberMemo(grid, MemoKey(MEMO_POINTED_SETS, box, key), box_version)
+                RemoveCandidates(grid, [c for c in geometry["units"][grid_length + firstColumn] if geometry["row_of"][c] < x_min or geometry["row_of"][c] >= x_min + box_size], bit, event)
 
     return grid
 
 def CheckBoxForRowOrColumnRestrictedSets(grid, x, y):
-    x_box = math.ceil((x+1)/grid["box_size"])
-    y_box = math.ceil((y+1)/grid["box_size"])
+    geometry = grid["geometry"]
+    box_size = geometry["box_size"]
+    grid_length = geometry["grid_length"]
+    candidates = grid["candidates"]
+
+    box = geometry["box_of"][x * grid_length + y]
+    x_min, y_min = geometry["box_origins"][box]
+    box_cells = geometry["units"][2 * grid_length + box]
+
+    #reads every row and column that crosses the box, versions only grow so their sum changes whenever one of them does
+    versions = grid["unit_versions"]
+    stamp = sum(versions[i] for i in range(x_min, x_min + box_size)) + sum(versions[grid_length + i] for i in range(y_min, y_min + box_size))
+    if IsScanCurrent(grid, ("restricted_sets", box), stamp):
+        return grid
+    if grid["stats"] is not None:
+        grid["stats"]["cells_scanned"] += 2 * box_size * grid_length
+
+    for i in range(x_min, x_min + box_size):
+        numbers_in_row = 0
+        numbers_outside = 0
+        for c in geometry["units"][i]:
+            j = geometry["column_of"][c]
+            if j < y_min or j >= y_min + box_size:
+                numbers_outside |= candidates[c]
+            else:
+                numbers_in_row |= candidates[c]
+        numbers_in_row &= ~numbers_outside
 
-    x_min = grid["box_size"] * (x_box - 1)
-    y_min = grid["box_size"] * (y_box - 1)
+        if IsMemoCurrent(grid, MemoKey(MEMO_RESTRICTED_SETS, box, numbers_in_row), versions[2 * grid_length + box]):
+            continue;
 
-    grid_length = len(grid["solution"])
+        if numbers_in_row:
+            line = tuple(c for c in box_cells if geometry["row_of"][c] == i)
+            RemoveCandidates(grid, [c for c in box_cells if geometry["row_of"][c] != i], numbers_in_row, (TECHNIQUE_RESTRICTED_SET, numbers_in_row, line))
+            RememberMemo(grid, MemoKey(MEMO_RESTRICTED_SETS, box, numbers_in_row), versions[2 * grid_length + box])
+
+    for i in range(y_min, y_min + box_size):
+        numbers_in_col = 0
+        numbers_outside = 0
+        for c in geometry["units"][grid_length + i]:
+            j = geometry["row_of"][c]
+            if j < x_min or j >= x_min + box_size:
+                numbers_outside |= candidates[c]
+            else:
+                numbers_in_col |= candidates[c]
+        numbers_in_col &= ~numbers_outside
 
-    changes = set()
-
-    for i in range(x_min, x_min + grid["box_size"]):
-        numbers_in_row = set()
-        for j in range(y_min, y_min + grid["box_size"]):
-            for k in range(grid_length):
-                if grid["notes"][i][j][k]:
-                    numbers_in_row.add(k)
-
-        for j in range(grid_length):
-            if j < y_min or j >= y_min + grid["box_size"]:
-                toRemove = set()
-                for n in numbers_in_row:
-                    if grid["notes"][i][j][n]:
-                        toRemove.add(n)
-                
-                for n in toRemove:
-                    numbers_in_row.remove(n)
-        
-        if ((x_box, y_box), frozenset(numbers_in_row)) in grid["box_restrictions"]:
-            continue;
-        
-        if len(numbers_in_row) > 0:
-            grid["solution_log"].append("found values restricted to row in box row: " + str(i) + " box_x: " + str(x_box) + " box_y: " + str(y_box) + " numbers: " + str({num + 1 for num in numbers_in_row}))
-            grid["box_restrictions"].add(((x_box, y_box), frozenset(numbers_in_row)))
-            num_changed = 0
-            for n in numbers_in_row:
-                for j in range(x_min, x_min + grid["box_size"]):
-                    for k in range(y_min, y_min + grid["box_size"]):
-                        if j != i and grid["notes"][j][k][n]:
-                            num_changed += 1
-                            grid["solution_log"].append("restricted box row removed: " + str(n + 1) + " at row: " + str(j) + " col: " + str(k))
-                            grid["notes"][j][k][n] = False
-                            changes.add((j,k))
-            if num_changed == 0:
-                    grid["solution_log"].pop()
-    
-    for i in range(y_min, y_min + grid["box_size"]):
-        numbers_in_col = set()
-        for j in range(x_min, x_min + grid["box_size"]):
-            for k in range(grid_length):
-                if grid["notes"][j][i][k]:
-                    numbers_in_col.add(k)
-
-        for j in range(grid_length):
-            if j < x_min or j >= x_min + grid["box_size"]:
-                toRemove = set()
-                for n in numbers_in_col:
-                    if grid["notes"][j][i][n]:
-                        toRemove.add(n)
-                
-                for n in toRemove:
-                    numbers_in_col.remove(n)
-
-        if ((x_box, y_box), frozenset(numbers_in_col)) in grid["box_restrictions"]:
+        if IsMemoCurrent(grid, MemoKey(MEMO_RESTRICTED_SETS, box, numbers_in_col), versions[2 * grid_length + box]):
             continue;
-        
-        if len(numbers_in_col) > 0:
-            grid["solution_log"].append("found values restricted to column in box column: " + str(i) + " box_x: " + str(x_box) + " box_y: " + str(y_box) + " numbers: " + str({num + 1 for num in numbers_in_col}))
-            grid["box_restrictions"].add(((x_box, y_box), frozenset(numbers_in_col)))
-            num_changed = 0
-            for n in numbers_in_col:
-                for j in range(x_min, x_min + grid["box_size"]):
-                    for k in range(y_min, y_min + grid["box_size"]):
-                        if k != i and grid["notes"][j][k][n]:
-                            num_changed += 1
-                            grid["solution_log"].append("restricted box column removed: " + str(n + 1) + " at row: " + str(j) + " col: " + str(k))
-                            grid["notes"][j][k][n] = False
-                            changes.add((j,k))
-            if num_changed == 0:
-                    grid["solution_log"].pop()
-    
-    if len(changes) > 0:
-        for p in changes:
-            grid = PerformPointChecks(grid, p[0], p[1])
-    
-    return grid
 
-def CheckPointForXWings(grid, x, y):
+        if numbers_in_col:
+            line = tuple(c for c in box_cells if geometry["column_of"][c] == i)
+            RemoveCandidates(grid, [c for c in box_cells if geometry["column_of"][c] != i], numbers_in_col, (TECHNIQUE_RESTRICTED_SET, numbers_in_col, line))
+            RememberMemo(grid, MemoKey(MEMO_RESTRICTED_SETS, box, numbers_in_col), versions[2 * grid_length + box])
 
-    grid_length = grid["box_size"] ** 2
+    return grid
 
-    changed = set()
+#fish of size 2 to 4, x-wing, swordfish and jellyfish, indexed by size
+FISH_EVENTS = {2 : TECHNIQUE_X_WING, 3 : TECHNIQUE_SWORDFISH, 4 : TECHNIQUE_JELLYFISH}
+FISH_SIZES = (2, 3, 4)
 
-    number_counts = {}
 
-    for i in range(grid_length):
-        if grid["notes"][x][y][i]:
-            if not (x,y,i) in grid["x_wings"]:
-                number_counts[i] = set()
+#positions[line] is a bitmask of where n can go in that line, so a fish is a set cover test on a few masks
+#the rows are the base lines first and the columns second, every number only needs one pass per round
+#eliminations only ever shrink the masks, so a fish found in masks that are out of date still holds
+def CheckNumberForFish(grid, n):
+    geometry = grid["geometry"]
+    grid_length = geometry["grid_length"]
+    candidates = grid["candidates"]
 
-    if len(number_counts.keys()) == 0:
+    #the cover lines can be anywhere, so any change in the grid means looking again
+    if IsScanCurrent(grid, ("fish", n), grid["candidate_version"]):
         return grid
-    
-    for i in range(grid_length):
-        for j in range(grid_length):
-            if grid["notes"][x][i][j]:
-                if j in number_counts:
-                    number_counts[j].add(i)
-
-    candidates = []
-
-    for key in number_counts.keys():
-        if len(number_counts[key]) == 2:
-            candidates.append(key)
-
-    if len(candidates) > 0:
-        for i in range(grid_length):
-            if i != x:
-                candidate_number_counts = {}
-                for k in candidates:
-                    candidate_number_counts[k] = set()
-                for j in range(grid_length):
-                    for k in candidates:
-                        if grid["notes"][i][j][k]:
-                            candidate_number_counts[k].add(j)
-                
-                for key in candidate_number_counts.keys():
-                    if len(candidate_number_counts[key]) == 2:
-                        if candidate_number_counts[key] == number_counts[key]:
-                            grid["solution_log"].append("found an xwing for " + str(key + 1) + " on rows: " + str({i, x}) + " and columns: " + str(number_counts[key]))
-                            num_changed = 0
-                            for c in number_counts[key]:
-                                grid["x_wings"].add((i, c, key))
-                                grid["x_wings"].add((x, c, key))
-
-                            for j in range(grid_length):
-                                if j != x and j != i:
-                                    for c in number_counts[key]:
-                                        num_changed += 1
-                                        grid["solution_log"].append("xwing removed " + str(key + 1) + " from row: " + str(j) + " and column: " + str(c))
-                                        grid["notes"][j][c][key] = False
-                                        changed.add((j,c))
-                            if num_changed == 0:
-                                grid["solution_log"].pop()
-    
-    number_counts = {}
-
-    for i in range(grid_length):
-        if grid["notes"][x][y][i]:
-            number_counts[i] = set()
-    
-    for i in range(grid_length):
-        for j in range(grid_length):
-            if grid["notes"][i][y][j]:
-                if j in number_counts:
-                    number_counts[j].add(i)
-
-    candidates = []
-
-    if len(candidates) > 0:
-        for key in number_counts.keys():
-            if len(number_counts[key]) == 2:
-                candidates.append(key)
-
-        for i in range(grid_length):
-            if i != y:
-                candidate_number_counts = {}
-                for k in candidates:
-                    candidate_number_counts[k] = set()
-                for j in range(grid_length):
-                    for k in candidates:
-                        if grid["notes"][j][i][k]:
-                            candidate_number_counts[k].add(j)
-                
-                for key in candidate_number_counts.keys():
-                    if len(candidate_number_counts[key]) == 2:
-                        if candidate_number_counts[key] == number_counts[key]:
-                            grid["solution_log"].append("found an xwing for " + str(key + 1) + " on rows: " + str({number_counts[key]}) + " and columns: " + str({i, y}))
-                            num_changed = 0
-                            for r in number_counts[key]:
-                                grid["x_wings"].add((r, i, key))
-                                grid["x_wings"].add((r, y, key))
-
-                            for j in range(grid_length):
-                                if j != y and j != i:
-                                    for r in number_counts[key]:
-                                        num_changed += 1
-                                        grid["solution_log"].append("xwing removed: " + str(key + 1) + " on rows: " + str({number_counts[key]}) + " and columns: " + str({i, y}))
-                                        grid["notes"][r][j][key] = False
-                                        changed.add((r,j))
-                            if num_changed == 0:
-                                grid["solution_log"].pop()
-
-    if len(changed) > 0:
-        for p in changed:
-            grid = PerformPointChecks(grid, p[0], p[1])
-    
-    return grid;
-
-def CheckPointForYWings(grid, x, y):
-    x_box = math.ceil((x+1)/grid["box_size"])
-    y_box = math.ceil((y+1)/grid["box_size"])
-
-    x_min = grid["box_size"] * (x_box - 1)
-    y_min = grid["box_size"] * (y_box - 1)
-
-    grid_length = grid["box_size"] ** 2
-
-    changed = set()
+    if grid["stats"] is not None:
+        grid["stats"]["cells_scanned"] += geometry["cell_count"]
+
+    bit = 1 << n
+    row_positions = [0] * grid_length
+    column_positions = [0] * grid_length
+    for c in range(geometry["cell_count"]):
+        if candidates[c] & bit:
+            row_positions[geometry["row_of"][c]] |= 1 << geometry["column_of"][c]
+            column_positions[geometry["column_of"][c]] |= 1 << geometry["row_of"][c]
+
+    for positions, to_cell in ((row_positions, lambda line, cross: line * grid_length + cross), (column_positions, lambda line, cross: cross * grid_length + line)):
+        for size in FISH_SIZES:
+            #lines where n is already placed have no positions and are no use as a base
+            lines = [line for line in range(grid_length) if 2 <= PopCount(positions[line]) <= size]
+            if len(lines) < size:
+                continue
+            for base, cover in FindCoveringSets(positions, lines, size):
+                crosses = MaskToNumbers(cover)
+                cells = [to_cell(line, cross) for line in range(grid_length) if line not in base for cross in crosses]
+                fish = tuple(sorted(to_cell(line, cross) for line in base for cross in MaskToNumbers(positions[line])))
+                RemoveCandidates(grid, cells, bit, (FISH_EVENTS[size], n + 1, fish))
 
-    current_notes = []
+    return grid
 
-    for i in range(grid_length):
-        if grid["notes"][x][y][i]:
-            current_notes.append(i)
+#a pivot {a, b} with a peer {a, c} and a peer {b, c} means one of the wings is c, so nothing seeing both wings can be
+#the wing holding a comes from the bivalue index and the one that has to match it straight from its pair bucket
+def CheckGridForYWings(grid):
+    geometry = grid["geometry"]
+    candidates = grid["candidates"]
+    peer_sets = geometry["peer_sets"]
+    pair_cells = grid["pair_cells"]
 
-    if len(current_notes) != 2:
+    #the wings can be anywhere, so any change in the grid means looking again
+    if IsScanCurrent(grid, ("y_wings",), grid["candidate_version"]):
         return grid
-    
-    current_point = (x,y)
-    
-    potential_ywings = {}
-
-    potential_ywings[current_point] = []
 
-    cached_notes = {}
+    for pivot in sorted(set().union(*grid["bivalue_cells"])):
+        pivot_mask = candidates[pivot]
+        if PopCount(pivot_mask) != 2:
+            continue
+        a, b = MaskToNumbers(pivot_mask)
+        if grid["stats"] is not None:
+            grid["stats"]["cells_scanned"] += len(grid["bivalue_cells"][a])
 
-    for i in range(grid_length):
-        if i != x:
-            target_notes = set()
-            for j in range(grid_length):
-                if grid["notes"][i][y][j]:
-                    target_notes.add(j)
-            
-            if len(target_notes) != 2:
+        for wing1 in sorted(grid["bivalue_cells"][a] & peer_sets[pivot]):
+            wing1_mask = candidates[wing1]
+            if PopCount(wing1_mask) != 2 or wing1_mask & (1 << b) or not wing1_mask & (1 << a):
                 continue
-
-            if (current_notes[0] in target_notes and current_notes[1] not in target_notes) or (current_notes[1] in target_notes and current_notes[0] not in target_notes):
-                point = (i,y)
-                cached_notes[point] = list(target_notes)
-                
-                if point in potential_ywings.keys():
-                    potential_ywings[point].append(current_point)
-                else:
-                    potential_ywings[point] = [current_point]
-                potential_ywings[current_point].append(point)
-    
-    for i in range(grid_length):
-        if i != y:
-            target_notes = set()
-            for j in range(grid_length):
-                if grid["notes"][x][i][j]:
-                    target_notes.add(j)
-            
-            if len(target_notes) != 2:
+            c = LowestBit(wing1_mask & ~(1 << a))
+            wing2_mask = (1 << b) | (1 << c)
+            if wing2_mask not in pair_cells:
                 continue
+            for wing2 in sorted(pair_cells[wing2_mask] & peer_sets[pivot]):
+                event = (TECHNIQUE_Y_WING, c + 1, (pivot, wing1, wing2))
+                RemoveCandidates(grid, GetCommonPeers(geometry, wing1, wing2), 1 << c, event)
 
-            if (current_notes[0] in target_notes and current_notes[1] not in target_notes) or (current_notes[1] in target_notes and current_notes[0] not in target_notes):
-                point = (x,i)
-                cached_notes[point] = list(target_notes)
-                if point in potential_ywings.keys():
-                    potential_ywings[point].append(current_point)
-                else:
-                    potential_ywings[point] = [current_point]
-                potential_ywings[current_point].append(point)
-
-    for i in range(x_min, x_min + grid["box_size"]):
-        for j in range(y_min, y_min + grid["box_size"]):
-            if i != x and j != y:
-                target_notes = set()
-                for k in range(grid_length):
-                    if grid["notes"][i][j][k]:
-                        target_notes.add(k)
-                
-                if len(target_notes) != 2:
-                    continue
+    return grid
 
-                if (current_notes[0] in target_notes and current_notes[1] not in target_notes) or (current_notes[1] in target_notes and current_notes[0] not in target_notes):
-                    point = (i,j)
-                    cached_notes[point] = list(target_notes)
-                    if point in potential_ywings.keys():
-                        potential_ywings[point].append(current_point)
-                    else:
-                        potential_ywings[point] = [current_point]
-                    potential_ywings[current_point].append(point)
+#a pivot {a, b, c} with a peer {a, c} and a peer {b, c} means one of the three is c, so nothing seeing all three can be
+#each wing is a peer of the pivot in the bucket of a pair out of the pivot's numbers
+def CheckGridForXYZWings(grid):
+    geometry = grid["geometry"]
+    candidates = grid["candidates"]
+    peer_sets = geometry["peer_sets"]
+    pair_cells = grid["pair_cells"]
 
+    if IsScanCurrent(grid, ("xyz_wings",), grid["candidate_version"]):
+        return grid
+    if grid["stats"] is not None:
+        grid["stats"]["cells_scanned"] += geometry["cell_count"]
 
-    for p in potential_ywings.keys():
-        if p == (x,y):
+    for pivot in range(geometry["cell_count"]):
+        pivot_mask = candidates[pivot]
+        if PopCount(pivot_mask) != 3:
             continue
 
-        p_x_box = math.ceil((p[0]+1)/grid["box_size"])
-        p_y_box = math.ceil((p[1]+1)/grid["box_size"])
-
-        p_x_min = grid["box_size"] * (p_x_box - 1)
-        p_y_min = grid["box_size"] * (p_y_box - 1)
-
-        if current_notes[0] == cached_notes[p][0] or current_notes[0] == cached_notes[p][1]:
-            matching_num = current_notes[0]
-            mismatching_num = current_notes[1]
-        else:
-            matching_num = current_notes[1]
-            mismatching_num = current_notes[0]
-
-        for i in range(grid_length):
-            if i != p[0]:
-                target_point = (i, p[1])
-                if target_point in cached_notes.keys():
-                    target_notes = set(cached_notes[target_point])
-                else:
-                    target_notes = set()
-                    for j in range(grid_length):
-                        if grid["notes"][i][p[1]][j]:
-                            target_notes.add(j)
-                
-                if len(target_notes) != 2:
-                    continue
-
-                if mismatching_num in target_notes and matching_num not in target_notes and ((cached_notes[p][0] in target_notes) ^ (cached_notes[p][1] in target_notes)):
-                    cached_notes[target_point] = list(target_notes)
-                    potential_ywings[p].append(target_point)
-        
-        for i in range(grid_length):
-            if i != p[1]:
-                target_point = (p[0], i)
-                if target_point in cached_notes.keys():
-                    target_notes = set(cached_notes[target_point])
-                else:
-                    target_notes = set()
-                    for j in range(grid_length):
-                        if grid["notes"][p[0]][i][j]:
-                            target_notes.add(j)
-                
-                if len(target_notes) != 2:
-                    continue
+        wings = []
+        for n in MaskToNumbers(pivot_mask):
+            pair = pivot_mask & ~(1 << n)
+            if pair in pair_cells:
+                wings.append((pair, sorted(pair_cells[pair] & peer_sets[pivot])))
+
+        for i in range(len(wings)):
+            for j in range(i + 1, len(wings)):
+                #two pairs out of the same three numbers always share exactly one
+                z = LowestBit(wings[i][0] & wings[j][0])
+                for wing1 in wings[i][1]:
+                    for wing2 in wings[j][1]:
+                        cells = [c for c in GetCommonPeers(geometry, wing1, wing2) if c in peer_sets[pivot]]
+                        RemoveCandidates(grid, cells, 1 << z, (TECHNIQUE_XYZ_WING, z + 1, (pivot, wing1, wing2)))
 
-                if mismatching_num in target_notes and matching_num not in target_notes and ((cached_notes[p][0] in target_notes) ^ (cached_notes[p][1] in target_notes)):
-                    cached_notes[target_point] = list(target_notes)
-                    potential_ywings[p].append(target_point)
-
-        for i in range(p_x_min, p_x_min + grid["box_size"]):
-            for j in range(p_y_min, p_y_min + grid["box_size"]):
-                if i != p[0] and j != p[1]:
-                    target_point = (i,j)
-                    if target_point in cached_notes.keys():
-                        target_notes = set(cached_notes[target_point])
-                    else:
-                        target_notes = set()
-                        for k in range(grid_length):
-                            if grid["notes"][i][j][k]:
-                                target_notes.add(k)
-                    
-                    if len(target_notes) != 2:
-                        continue
-
-                    if mismatching_num in target_notes and matching_num not in target_notes and ((cached_notes[p][0] in target_notes) ^ (cached_notes[p][1] in target_notes)):
-                        cached_notes[target_point] = list(target_notes)
-                        potential_ywings[p].append(target_point)
-
-    y_wings = []
-
-    for i in range(len(potential_ywings[current_point])):
-        target_wing = potential_ywings[current_point][i]
-        if cached_notes[target_wing][0] == current_notes[0] or cached_notes[target_wing][0] == current_notes[1]:
-            matching_num = cached_notes[target_wing][0]
-            mismatching_num = cached_notes[target_wing][1]
-        else:
-            matching_num = cached_notes[target_wing][1]
-            mismatching_num = cached_notes[target_wing][0]
-
-        for j in range(i+1, len(potential_ywings[current_point])):
-            second_wing = potential_ywings[current_point][j]
-            if (current_point, target_wing, second_wing) in grid["y_wings"] or (current_point, second_wing, target_wing) in grid["y_wings"]:
-                continue
-            if (cached_notes[second_wing][0] == mismatching_num and cached_notes[second_wing][1] != matching_num) or (cached_notes[second_wing][1] == mismatching_num and cached_notes[second_wing][0] != matching_num):
-                grid["y_wings"].add((current_point, target_wing, second_wing))
-                grid["y_wings"].add((current_point, second_wing, target_wing))
-                y_wings.append((current_point, target_wing, second_wing, mismatching_num))
-
-    for p in potential_ywings.keys():
-        if p != current_point:
-            for i in range(1, len(potential_ywings[p])):
-                if (p, current_point, potential_ywings[p][i]) in grid["y_wings"] or (p, potential_ywings[p][i], current_point) in grid["y_wings"]:
-                    continue
-                if current_notes[0] == cached_notes[p][0] or current_notes[0] == cached_notes[p][1]:
-                    mismatching_num = current_notes[1]
-                else:
-                    mismatching_num = current_notes[0]
-                grid["y_wings"].add((p, current_point, potential_ywings[p][i]))
-                grid["y_wings"].add((p, potential_ywings[p][i], current_point))
-                y_wings.append((p, current_point, potential_ywings[p][i], mismatching_num))
-
-    for y_wing in y_wings:
-
-        grid["solution_log"].append("found a ywing for pivot: " + str(y_wing[0]) + " wing1: " + str(y_wing[1]) + " wing2: " + str(y_wing[2]) + " for numbers: " + str(y_wing[3] + 1))
-        
-        grid, just_changed = RemovePossibleFromSharedSquares(grid, y_wing[3], y_wing[1], y_wing[2], [y_wing[0], y_wing[1], y_wing[2]])
-
-        changed |= just_changed
-
-        if len(just_changed)== 0:
-            grid["solution_log"].pop()
-
-    if len(changed) > 0:
-        for p in changed:
-            grid = PerformPointChecks(grid, p[0], p[1])
-    
     return grid
 
-def CheckPointForXYChains(grid, x, y):
-    grid_length = grid["box_size"] ** 2
-
-    #generally, you would label these as colors, I am going to use positions. So, [0] is "red" [1] is "black"
-    original_notes = []
-    for i in range(grid_length):
-        if grid["notes"][x][y][i]:
-            original_notes.append(i)
-    
-    if len(original_notes) != 2:
+#pairs of cells that are the only two places left for n in some unit
+def GetStrongLinks(grid, n):
+    candidates = grid["candidates"]
+    bit = 1 << n
+    links = []
+    for cells in grid["geometry"]["units"]:
+        positions = [c for c in cells if candidates[c] & bit]
+        if len(positions) == 2:
+            links.append((positions[0], positions[1]))
+    return links
+
+#two cells {x, y} that don't see each other, where x only has two places in some unit and each wing sees one of them
+#if the first wing isn't y it's x, then its end of the link isn't, the other end is and the second wing has to be y
+def CheckGridForWWings(grid):
+    geometry = grid["geometry"]
+    candidates = grid["candidates"]
+    peer_sets = geometry["peer_sets"]
+
+    if IsScanCurrent(grid, ("w_wings",), grid["candidate_version"]):
         return grid
-    
-    visited = set()
-
-    search_stack = [((x,y), original_notes, -1)]
-
-    current_chain = []
-
-    changed = set()
 
-    while len(search_stack) > 0:
+    #only worked out for the numbers some pair of wings needs
+    strong_links = {}
 
-        current_candidate = search_stack.pop()
-
-        current_point = current_candidate[0]
-        current_notes = current_candidate[1]
-        current_note_set = set(current_notes)
-        
-        if len(current_chain) == 0:
-            current_chain.append([current_point, 0, -1])
-            visited.add(current_point)
-        else:
-            while len(current_chain) > 0 and current_chain[-1][1] == 0:
-                no_longer_parent = current_chain.pop()
-                visited.remove(no_longer_parent[0])
-
-            if len(current_chain) > 0:
-                current_chain[-1][1] -= 1
-
-            if current_chain[-1][2] == -1:
-                if current_notes[0] == original_notes[0] or current_notes[0] == original_notes[1]:
-                    current_chain.append([current_point, 0, current_notes[0]])
-                else:
-                    current_chain.append([current_point, 0, current_notes[1]])
-            else:
-                current_chain.append([current_point, 0, current_candidate[2]])
-
-            visited.add(current_point)
-
-        x_box = math.ceil((current_point[0]+1)/grid["box_size"])
-        y_box = math.ceil((current_point[1]+1)/grid["box_size"])
-
-        x_min = grid["box_size"] * (x_box - 1)
-        y_min = grid["box_size"] * (y_box - 1)
-
-        num_children = 0
-
-        for i in range(grid_length):
-            if i != current_point[0]:
-                if (i,current_point[1]) in visited:
+    for mask, cells in sorted((mask, sorted(cells)) for mask, cells in grid["pair_cells"].items()):
+        for i in range(len(cells)):
+            for j in range(i + 1, len(cells)):
+                wing1 = cells[i]
+                wing2 = cells[j]
+                if wing2 in peer_sets[wing1]:
                     continue
 
-                target_notes = []
-                for j in range(grid_length):
-                    if grid["notes"][i][current_point[1]][j]:
-                        target_notes.append(j)
-                target_note_set = set(target_notes)
-                
-                if len(target_notes) != 2:
-                    continue
-                
-                intersect = target_note_set & current_note_set
-
-                if len(intersect) != 1:
-                    continue
+                for x in MaskToNumbers(mask):
+                    if candidates[wing1] != mask or candidates[wing2] != mask:
+                        break
+                    if x not in strong_links:
+                        strong_links[x] = GetStrongLinks(grid, x)
+                        if grid["stats"] is not None:
+                            grid["stats"]["cells_scanned"] += geometry["cell_count"] * 3
+
+                    y = LowestBit(mask & ~(1 << x))
+                    for end1, end2 in strong_links[x]:
+                        if end1 in (wing1, wing2) or end2 in (wing1, wing2):
+                            continue
+                        if (end1 in peer_sets[wing1] and end2 in peer_sets[wing2]) or (end2 in peer_sets[wing1] and end1 in peer_sets[wing2]):
+                            RemoveCandidates(grid, GetCommonPeers(geometry, wing1, wing2), 1 << y, (TECHNIQUE_W_WING, y + 1, (wing1, wing2, end1, end2)))
 
-                note = next(iter(intersect))
-                target_note_set.remove(note)
-                other_note = next(iter(target_note_set))
-
-                if note == current_notes[0] and other_note != current_notes[1] and (note != current_candidate[2] or current_candidate[2] == -1):
-                    search_stack.append(((i, current_point[1]), [other_note, note], note))
-                    num_children += 1
+    return grid
 
-                if note == current_notes[1] and other_note != current_notes[0] and (note != current_candidate[2] or current_candidate[2] == -1):
-                    search_stack.append(((i, current_point[1]), [note, other_note], note))
-                    num_children += 1
+#chains with more cells than this aren't looked for
+XY_CHAIN_LENGTH_LIMIT = 12
 
-        for i in range(grid_length):
-            if i != current_point[1]:
+#breadth first over the bivalue index, a step goes to a bivalue peer holding the number the last cell leaves on and leaves on its other number
+#a chain that leaves on the number its first cell doesn't leave on means one of its ends is that number, so their common peers can't be
+#the search is over (cell, number it leaves on) pairs so the shortest chain to each one is the one used, and the whole grid is one pass per round
+def CheckGridForXYChains(grid):
+    geometry = grid["geometry"]
+    candidates = grid["candidates"]
+    peer_sets = geometry["peer_sets"]
+    bivalue_cells = grid["bivalue_cells"]
 
-                if (current_point[0],i) in visited:
-                    continue
-                target_notes = []
-                for j in range(grid_length):
-                    if grid["notes"][current_point[0]][i][j]:
-                        target_notes.append(j)
-                target_note_set = set(target_notes)
-                
-
-                if len(target_notes) != 2:
-                    continue
-                
-                intersect = target_note_set & current_note_set
-
-                if len(intersect) != 1:
-                    continue
-
-                note = next(iter(intersect))
-                target_note_set.remove(note)
-                other_note = next(iter(target_note_set))
-
-                if note == current_notes[0] and other_note != current_notes[1] and (note != current_candidate[2] or current_candidate[2] == -1):
-                    search_stack.append(((current_point[0],i), [other_note, note], note))
-                    num_children += 1
-
-                if note == current_notes[1] and other_note != current_notes[0] and (note != current_candidate[2] or current_candidate[2] == -1):
-                    search_stack.append(((current_point[0],i), [note, other_note], note))
-                    num_children += 1
-
-        for i in range(x_min, x_min + grid["box_size"]):
-            for j in range(y_min, y_min + grid["box_size"]):
-                if i != current_point[0] and j != current_point[1]:
-
-                    if (i,j) in visited:
-                        continue
-                    target_notes = []
-                    for k in range(grid_length):
-                        if grid["notes"][i][j][k]:
-                            target_notes.append(k)
-                    target_note_set = set(target_notes)
-                    
-                    if len(target_notes) != 2:
-                        continue
-                    
-                    intersect = target_note_set & current_note_set
-
-                    if len(intersect) != 1:
-                        continue
-
-                    note = next(iter(intersect))
-                    target_note_set.remove(note)
-                    other_note = next(iter(target_note_set))
-
-                    if note == current_notes[0] and other_note != current_notes[1] and (note != current_candidate[2] or current_candidate[2] == -1):
-                        search_stack.append(((i, j), [other_note, note], note))
-                        num_children += 1
-
-                    if note == current_notes[1] and other_note != current_notes[0] and (note != current_candidate[2] or current_candidate[2] == -1):
-                        search_stack.append(((i, j), [note, other_note], note))
-                        num_children += 1
-
-        current_chain[-1][1] += num_children
-
-        #not the original point
-        if current_point == (x,y):
-            continue
+    #the chains can go anywhere, so any change in the grid means looking again
+    if IsScanCurrent(grid, ("xy_chains",), grid["candidate_version"]):
+        return grid
 
-        if len(current_chain) <= 2:
+    for start in sorted(set().union(*bivalue_cells)):
+        start_mask = candidates[start]
+        if PopCount(start_mask) != 2:
             continue
-        
-        #not a child of the original point (a 2 length tree)
-        if current_chain[-2][0] == (x,y):
-            continue
-
-        to_remove = []
-
-        if current_notes[0] == original_notes[1] and current_notes[0] != current_chain[1][2]:
-            to_remove.append(current_notes[0])
-        
-        if current_notes[1] == original_notes[0] and current_notes[1] != current_chain[1][2]:
-            to_remove.append(current_notes[1])  
-
-        for n in to_remove:
-            log = "Found XY-chain at these coordinates: "
-            for p in current_chain:
-                log += str(p[0]) + ','
 
-            log = log[:-1]
-
-            log += " for number: " + str(n+1)
-
-            grid["solution_log"].append(log)
-            grid, just_changed = RemovePossibleFromSharedSquares(grid, n, current_point, (x,y), [current_point, (x,y)])
-
-            changed |= just_changed
-
-            if len(just_changed) == 0:
-                grid["solution_log"].pop()
-
-    if len(changed) > 0:
-        for p in changed:
-            grid = PerformPointChecks(grid, p[0], p[1])
+        for end_number in MaskToNumbers(start_mask):
+            first = (start, LowestBit(start_mask & ~(1 << end_number)))
+            parents = {first : None}
+            frontier = [first]
+            length = 1
+
+            while len(frontier) > 0 and length < XY_CHAIN_LENGTH_LIMIT:
+                length += 1
+                next_frontier = []
+                for step in frontier:
+                    c, number = step
+                    if grid["stats"] is not None:
+                        grid["stats"]["cells_scanned"] += len(bivalue_cells[number])
+
+                    for target in bivalue_cells[number] & peer_sets[c]:
+                        target_mask = candidates[target]
+                        if target == start or PopCount(target_mask) != 2 or not target_mask & (1 << number):
+                            continue
+                        target_step = (target, LowestBit(target_mask & ~(1 << number)))
+                        if target_step in parents:
+                            continue
+                        parents[target_step] = step
+                        next_frontier.append(target_step)
+
+                        #three cells at least, two would just be a pair
+                        if target_step[1] == end_number and length >= 3:
+                            chain = []
+                            link = target_step
+                            while link is not None:
+                                chain.append(link[0])
+                                link = parents[link]
+                            event = (TECHNIQUE_XY_CHAIN, end_number + 1, tuple(reversed(chain)))
+                            RemoveCandidates(grid, GetCommonPeers(geometry, start, target), 1 << end_number, event)
+
+                frontier = next_frontier
 
     return grid
 
+#name: (function, scope), unit techniques take a unit id, box techniques a box origin, number techniques a number index and grid techniques nothing
+TECHNIQUES = {
+    "only_options" : (CheckUnitForOnlyOptions, "unit"),
+    "only_positions" : (CheckUnitForOnlyPositions, "unit"),
+    "sets" : (CheckUnitForSets, "unit"),
+    "pointed_sets" : (CheckBoxForPointedSets, "box"),
+    "restricted_sets" : (CheckBoxForRowOrColumnRestrictedSets, "box"),
+    "fish" : (CheckNumberForFish, "number"),
+    "y_wings" : (CheckGridForYWings, "grid"),
+    "xyz_wings" : (CheckGridForXYZWings, "grid"),
+    "w_wings" : (CheckGridForWWings, "grid"),
+    "xy_chains" : (CheckGridForXYChains, "grid"),
+}
+
+#techniques grouped into tiers from cheapest to most expensive
+STRATEGIES = {
+    "all" : (("only_options", "only_positions"), ("sets", "pointed_sets", "restricted_sets"), ("fish", "y_wings", "xyz_wings", "w_wings"), ("xy_chains",)),
+    "no-chains" : (("only_options", "only_positions"), ("sets", "pointed_sets", "restricted_sets"), ("fish", "y_wings", "xyz_wings", "w_wings")),
+    "basic" : (("only_options", "only_positions"), ("sets", "pointed_sets", "restricted_sets")),
+    "singles" : (("only_options", "only_positions"),),
+    "none" : (),
+}
+
+#a strategy is a profile name or a list of tiers, a tier is a technique name or a list of them, empty tiers are dropped
+def ResolveStrategy(strategy):
+    if isinstance(strategy, str):
+        if strategy not in STRATEGIES:
+            error = "unknown strategy: " + strategy + " pick one of: " + ", ".join(STRATEGIES.keys())
+            raise Exception(error)
+        strategy = STRATEGIES[strategy]
+
+    tiers = []
+    for tier in strategy:
+        if isinstance(tier, str):
+            tier = (tier,)
+        for name in tier:
+            if name not in TECHNIQUES:
+                error = "unknown technique: " + str(name) + " pick from: " + ", ".join(TECHNIQUES.keys())
+                raise Exception(error)
+        if len(tier) > 0:
+            tiers.append(tuple(tier))
+
+    return tuple(tiers)
+
+def IsGridSolved(grid):
+    for row in grid["solution"]:
+        for number in row:
+            if number == 0:
+                return False
+    return True
+
 def PrintSolution(grid):
     for r in grid["solution"]:
         print(r)
     print()
 
 def PrintNotes(grid):
-    for r in grid["notes"]:
-        for c in r:
-            numbers = []
-            for i in range(len(c)):
-                if c[i]:
-                    numbers.append(i+1)
-            print(numbers)
+    grid_length = len(grid["solution"])
+    for x in range(grid_length):
+        for y in range(grid_length):
+            print([n + 1 for n in MaskToNumbers(grid["candidates"][x * grid_length + y])])
         print()
         print()
 
 def PrintSolutionLog(grid):
-    for s in grid["solution_log"]:
+    for s in RenderSolutionLog(grid):
         print(s)
@@ -0,0 +1,158 @@
+import LizardSudokuSolver as s
+
+#numpy is optional, nothing else in the solver needs it, install it with pip install numpy to use this backend
+#without it NUMPY_AVAILABLE is False and BatchSolver refuses --backend numpy
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+#candidates live in an N x N x N boolean tensor indexed [row, column, number - 1]
+#singles and peer eliminations are done for the whole grid at once, whatever they can't finish goes to the python engine
+
+#(box, cell in box, ...) view of a (row, column, ...) array
+def BoxView(tensor, box_size):
+    grid_length = box_size ** 2
+    return tensor.reshape(box_size, box_size, box_size, box_size, -1).transpose(0, 2, 1, 3, 4).reshape(grid_length, grid_length, -1)
+
+def GetBoxIndex(box_size):
+    rows, columns = np.indices((box_size ** 2, box_size ** 2))
+    return (rows // box_size) * box_size + columns // box_size
+
+#returns None when a number is placed twice in one unit
+def EliminatePlacedNumbers(candidates, solution, box_size, box_index):
+    grid_length = box_size ** 2
+
+    placed = np.zeros((grid_length, grid_length, grid_length), dtype=bool)
+    xs, ys = np.nonzero(solution)
+    placed[xs, ys, solution[xs, ys] - 1] = True
+
+    row_used = placed.sum(axis=1)
+    column_used = placed.sum(axis=0)
+    box_used = BoxView(placed, box_size).sum(axis=1)
+
+    if (row_used > 1).any() or (column_used > 1).any() or (box_used > 1).any():
+        return None
+
+    blocked = (row_used[:, None, :] > 0) | (column_used[None, :, :] > 0) | (box_used[box_index] > 0)
+    candidates &= ~blocked
+    candidates[solution > 0] = False
+
+    return row_used > 0, column_used > 0, box_used > 0
+
+#adds one batch of found singles, False if a cell is given two different numbers
+def AddSingles(values, xs, ys, numbers):
+    existing = values[xs, ys]
+    if ((existing != 0) & (existing != numbers)).any():
+        return False
+    values[xs, ys] = numbers
+    return bool((values[xs, ys] == numbers).all())
+
+def FindSingles(candidates, solution, used, box_size):
+    grid_length = box_size ** 2
+    row_used, column_used, box_used = used
+
+    empty = solution == 0
+    counts = candidates.sum(axis=2)
+    if (empty & (counts == 0)).any():
+        return None
+
+    values = np.zeros((grid_length, grid_length), dtype=solution.dtype)
+
+    naked = empty & (counts == 1)
+    xs, ys = np.nonzero(naked)
+    values[xs, ys] = candidates[xs, ys].argmax(axis=1) + 1
+
+    #a number that isn't placed in a unit and has nowhere left to go means the puzzle is broken
+    row_counts = candidates.sum(axis=1)
+    column_counts = candidates.sum(axis=0)
+    box_candidates = BoxView(candidates, box_size)
+    box_counts = box_candidates.sum(axis=1)
+    if ((row_counts == 0) & ~row_used).any() or ((column_counts == 0) & ~column_used).any() or ((box_counts == 0) & ~box_used).any():
+        return None
+
+    xs, ns = np.nonzero(row_counts == 1)
+    ys = candidates[xs, :, ns].argmax(axis=1)
+    if not AddSingles(values, xs, ys, ns + 1):
+        return None
+
+    ys, ns = np.nonzero(column_counts == 1)
+    xs = candidates[:, ys, ns].argmax(axis=0)
+    if not AddSingles(values, xs, ys, ns + 1):
+        return None
+
+    boxes, ns = np.nonzero(box_counts == 1)
+    cells = box_candidates[boxes, :, ns].argmax(axis=1)
+    xs = (boxes // box_size) * box_size + cells // box_size
+    ys = (boxes % box_size) * box_size + cells % box_size
+    if not AddSingles(values, xs, ys, ns + 1):
+        return None
+
+    return values
+
+#places singles until there are none left, consistent is False as soon as the puzzle contradicts itself
+def PropagateSingles(box_size, puzzle):
+    grid_length = box_size ** 2
+    box_index = GetBoxIndex(box_size)
+
+    solution = np.array(puzzle, dtype=np.int16).reshape(grid_length, grid_length)
+    candidates = np.ones((grid_length, grid_length, grid_length), dtype=bool)
+    order = [solution.copy()]
+
+    while True:
+        used = EliminatePlacedNumbers(candidates, solution, box_size, box_index)
+        if used is None:
+            return solution, candidates, order, False
+
+        values = FindSingles(candidates, solution, used, box_size)
+        if values is None:
+            return solution, candidates, order, False
+
+        if not values.any():
+            return solution, candidates, order, True
+
+        solution[values > 0] = values[values > 0]
+        order.append(values)
+
+def CandidateMasks(candidates):
+    grid_length = candidates.shape[0]
+    bits = np.left_shift(1, np.arange(grid_length, dtype=np.int64))
+    return (candidates.astype(np.int64) * bits).sum(axis=2).reshape(-1)
+
+#copies the tensor state into a normal grid, the placements are logged round by round
+def LoadIntoGrid(grid, solution, candidates, order):
+    grid_length = grid["geometry"]["grid_length"]
+    log = grid["solution_log"]
+
+    for values in order:
+        xs, ys = np.nonzero(values)
+        for x, y in zip(xs.tolist(), ys.tolist()):
+            grid["solution"][x][y] = int(values[x, y])
+            if log is not None:
+                log.append((s.LOG_PLACE, int(values[x, y]), (x * grid_length + y,)))
+
+    grid["candidates"][:] = CandidateMasks(candidates).tolist()
+    return s.RebuildBivalueIndex(grid)
+
+#same result as LoadGivens on an empty grid, the python techniques then carry on from where the singles stopped
+def LoadWithNumpy(grid, puzzle):
+    if not NUMPY_AVAILABLE:
+        raise Exception("the numpy backend needs numpy installed")
+
+    solution, candidates, order, consistent = PropagateSingles(grid["box_size"], puzzle)
+
+    #broken puzzles go through the normal path so they fail the same way the python backend does
+    if not consistent:
+        return s.LoadGivens(grid, puzzle)
+
+    grid = LoadIntoGrid(grid, solution, candidates, order)
+    s.QueueAllUnits(grid)
+    return s.PropagateChecks(grid)
+
+def SolveWithNumpy(box_size, puzzle, keep_log=True, collect_stats=False, strategy="all"):
+    grid = s.CreateSudokuGrid(box_size, keep_log, strategy=strategy)
+    if collect_stats:
+        grid = s.EnableStats(grid)
+    return LoadWithNumpy(grid, puzzle)
@@ -0,0 +1,230 @@
+import argparse
+import functools
+import multiprocessing
+import os
+import random
+import sys
+
+import LizardSudokuSolver as s
+import PuzzleIO as pio
+import SolutionCounter as sc
+
+#profiles from easiest to hardest, a puzzle's difficulty is the first one that solves it without search
+DIFFICULTIES = ("singles", "basic", "no-chains", "all")
+
+#how many fresh grids are tried before settling for a puzzle that came out easier than asked
+GENERATE_ATTEMPTS = 8
+
+#an empty grid almost never runs into a dead end while it is filled, so only the singles run between branches
+FILL_STRATEGY = "singles"
+
+#clues are removed a whole orbit at a time so the puzzle keeps its symmetry
+SYMMETRIES = {
+    "none" : lambda n, x, y: [(x, y)],
+    "rotational" : lambda n, x, y: [(x, y), (n - 1 - x, n - 1 - y)],
+    "quarter" : lambda n, x, y: [(x, y), (y, n - 1 - x), (n - 1 - x, n - 1 - y), (n - 1 - y, x)],
+    "mirror" : lambda n, x, y: [(x, y), (x, n - 1 - y)],
+    "diagonal" : lambda n, x, y: [(x, y), (y, x)],
+}
+
+#a 25x25 puzzle minimized on uniqueness alone gets down to about 300 clues before a single check takes minutes
+#with a strategy every step is a quick logic solve, and with enough clues left the checks stay cheap too
+SLOW_BOX_SIZES = (5,)
+
+#fills an empty grid depth first like SolutionCounter.CountFromGrid, trying each cell's numbers in a random order
+def FillGrid(box_size, rng):
+    grid = s.CreateSudokuGrid(box_size, False, strategy=FILL_STRATEGY)
+    c = sc.GetBranchCell(grid)
+    numbers = s.MaskToNumbers(grid["candidates"][c])
+    rng.shuffle(numbers)
+    stack = [(s.Checkpoint(grid), numbers, c)]
+
+    while len(stack) > 0:
+        mark, numbers, c = stack[-1]
+        if len(numbers) == 0:
+            stack.pop()
+            continue
+
+        s.Rollback(grid, mark)
+        if not sc.TryPlacement(grid, c, numbers.pop()):
+            continue
+
+        next_cell = sc.GetBranchCell(grid)
+        if next_cell is None:
+            return [list(row) for row in grid["solution"]]
+        numbers = s.MaskToNumbers(grid["candidates"][next_cell])
+        rng.shuffle(numbers)
+        stack.append((s.Checkpoint(grid), numbers, next_cell))
+
+    raise Exception("no grid could be filled for box_size " + str(box_size))
+
+#a randomly filled grid, shuffled with moves that keep it valid so the search's own order doesn't show
+def GenerateFullGrid(box_size, rng):
+    grid_length = box_size ** 2
+    filled = FillGrid(box_size, rng)
+
+    rows = [band * box_size + r for band in rng.sample(range(box_size), box_size) for r in rng.sample(range(box_size), box_size)]
+    columns = [stack * box_size + c for stack in rng.sample(range(box_size), box_size) for c in rng.sample(range(box_size), box_size)]
+    numbers = [0] + rng.sample(range(1, grid_length + 1), grid_length)
+
+    full_grid = [[numbers[filled[x][y]] for y in columns] for x in rows]
+
+    if rng.random() < 0.5:
+        full_grid = [list(row) for row in zip(*full_grid)]
+
+    return full_grid
+
+#every cell exactly once, grouped with the cells its symmetry ties it to
+def GetOrbits(grid_length, symmetry):
+    if symmetry not in SYMMETRIES:
+        error = "unknown symmetry: " + symmetry + " pick one of: " + ", ".join(SYMMETRIES.keys())
+        raise Exception(error)
+
+    seen = set()
+    orbits = []
+    for x in range(grid_length):
+        for y in range(grid_length):
+            if (x, y) in seen:
+                continue
+            orbit = []
+            for cell in SYMMETRIES[symmetry](grid_length, x, y):
+                if cell not in seen:
+                    seen.add(cell)
+                    orbit.append(cell)
+            orbits.append(orbit)
+    return orbits
+
+def CountClues(puzzle):
+    return sum(1 for row in puzzle for number in row if number != 0)
+
+#true when the strategy's techniques fill the whole grid on their own, which also means the solution is unique
+def IsSolvedByStrategy(box_size, puzzle, strategy):
+    try:
+        grid = s.LoadGivens(s.CreateSudokuGrid(box_size, False, strategy=strategy), puzzle)
+    except s.SolveContradiction:
+        return False
+    return s.IsGridSolved(grid)
+
+#the easiest profile that solves the puzzle, "search" when none of them can
+def GetDifficulty(box_size, puzzle):
+    for strategy in DIFFICULTIES:
+        if IsSolvedByStrategy(box_size, puzzle, strategy):
+            return strategy
+    return "search"
+
+#with a strategy the puzzle has to stay solvable by it, otherwise emptying the cells must not have let in another solution
+def IsAcceptable(box_size, puzzle, strategy, solution, cells):
+    if strategy is not None:
+        return IsSolvedByStrategy(box_size, puzzle, strategy)
+    return not sc.HasOtherSolution(box_size, puzzle, solution, cells)
+
+#removes clue orbits in a random order while the puzzle stays acceptable, stopping once clues are left
+#orbits with a cell that is already empty are left alone so an existing puzzle keeps whatever symmetry it has
+def Minimize(box_size, puzzle, rng, clues=None, strategy=None, symmetry="none"):
+    puzzle = [list(row) for row in puzzle]
+    solution = None
+    if strategy is not None:
+        if not IsSolvedByStrategy(box_size, puzzle, strategy):
+            raise Exception("puzzle can't be solved with the " + str(strategy) + " strategy")
+    else:
+        solution = sc.GetUniqueSolution(box_size, puzzle)
+        if solution is None:
+            raise Exception("puzzle doesn't have exactly one solution")
+
+    orbits = GetOrbits(len(puzzle), symmetry)
+    rng.shuffle(orbits)
+    remaining = CountClues(puzzle)
+
+    for orbit in orbits:
+        if clues is not None and remaining <= clues:
+            break
+        if any(puzzle[x][y] == 0 for x, y in orbit):
+            continue
+
+        removed = [puzzle[x][y] for x, y in orbit]
+        for x, y in orbit:
+            puzzle[x][y] = 0
+        if IsAcceptable(box_size, puzzle, strategy, solution, orbit):
+            remaining -= len(orbit)
+        else:
+            for (x, y), number in zip(orbit, removed):
+                puzzle[x][y] = number
+
+    return puzzle
+
+#with a strategy a few grids are tried until one comes out needing exactly that strategy, the last one is kept if none do
+def GeneratePuzzle(box_size, rng, clues=None, strategy=None, symmetry="none"):
+    for attempt in range(GENERATE_ATTEMPTS if strategy is not None else 1):
+        puzzle = Minimize(box_size, GenerateFullGrid(box_size, rng), rng, clues, strategy, symmetry)
+        if strategy is None or GetDifficulty(box_size, puzzle) == strategy:
+            break
+    return puzzle
+
+#each puzzle gets its own seed from the run's seed and its position, so a run gives the same puzzles however many workers it has
+def GenerateIndexed(index, box_size, seed, clues, strategy, symmetry):
+    rng = random.Random(str(seed) + "-box" + str(box_size) + "-" + str(index))
+    return GeneratePuzzle(box_size, rng, clues, strategy, symmetry)
+
+def MinimizeIndexed(item, seed, clues, strategy, symmetry):
+    index, line = item
+    box_size, puzzle = pio.ParsePuzzleString(line)
+    rng = random.Random(str(seed) + "-minimize-" + str(index))
+    return Minimize(box_size, puzzle, rng, clues, strategy, symmetry)
+
+def RunPool(function, items, workers):
+    if workers <= 1:
+        for item in items:
+            yield function(item)
+        return
+
+    with multiprocessing.Pool(workers) as pool:
+        for result in pool.imap(function, items):
+            yield result
+
+#puzzles come back in order
+def GeneratePuzzles(box_size, count, seed=0, clues=None, strategy=None, symmetry="none", workers=1):
+    generate = functools.partial(GenerateIndexed, box_size=box_size, seed=seed, clues=clues, strategy=strategy, symmetry=symmetry)
+    return RunPool(generate, range(count), workers)
+
+def MinimizePuzzles(lines, seed=0, clues=None, strategy=None, symmetry="none", workers=1):
+    minimize = functools.partial(MinimizeIndexed, seed=seed, clues=clues, strategy=strategy, symmetry=symmetry)
+    return RunPool(minimize, list(enumerate(lines)), workers)
+
+def ParseArguments(argv):
+    parser = argparse.ArgumentParser(description="Generate unique solution sudoku puzzles in the corpus format.")
+    parser.add_argument("-b", "--box-size", type=int, default=3, choices=(2, 3, 4, 5), help="box size of the generated puzzles, 5 needs --strategy or --clues (default: 3)")
+    parser.add_argument("-n", "--count", type=int, default=1, help="number of puzzles to generate (default: 1)")
+    parser.add_argument("--seed", default="0", help="the same seed always gives the same puzzles (default: 0)")
+    parser.add_argument("--clues", type=int, help="stop removing clues once this many are left (default: remove as many as possible)")
+    parser.add_argument("-s", "--strategy", choices=DIFFICULTIES, help="target difficulty, the puzzle has to stay solvable with this strategy and easier ones are retried")
+    parser.add_argument("--symmetry", default="none", choices=sorted(SYMMETRIES.keys()), help="keep the clues symmetric (default: none)")
+    parser.add_argument("-m", "--minimize", nargs="+", metavar="FILE", help="minimize the puzzles in these files instead of generating new ones")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 1, help="number of worker processes (default: all cores)")
+    parser.add_argument("-o", "--output", default="-", help="where to write one puzzle per line (default: stdout)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = ParseArguments(argv)
+
+    if args.minimize is None and args.box_size in SLOW_BOX_SIZES and args.strategy is None and args.clues is None:
+        sys.stderr.write("box size " + str(args.box_size) + " needs --strategy or --clues, a single uniqueness check can take minutes once it gets down to about 300 clues\n")
+        return 2
+
+    if args.minimize is not None:
+        lines = [line for path in args.minimize for line in pio.ReadPuzzleLines(path)]
+        puzzles = MinimizePuzzles(lines, args.seed, args.clues, args.strategy, args.symmetry, args.workers)
+        header = "# minimized from " + ", ".join(args.minimize)
+    else:
+        puzzles = GeneratePuzzles(args.box_size, args.count, args.seed, args.clues, args.strategy, args.symmetry, args.workers)
+        header = "# box_size " + str(args.box_size) + " seed " + str(args.seed) + " symmetry " + args.symmetry + (" strategy " + args.strategy if args.strategy is not None else "")
+
+    with pio.OpenOutput(args.output) as output:
+        output.write(header + "\n")
+        for puzzle in puzzles:
+            output.write(pio.FormatPuzzleString(puzzle) + "\n")
+            output.flush()
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+import argparse
+import functools
+import json
+import os
+import sys
+import time
+
+import LizardSudokuSolver as s
+import PuzzleIO as pio
+
+#score added every time a technique is used, harder techniques count for more and needing search counts the most
+TECHNIQUE_WEIGHTS = {
+    s.TECHNIQUE_ONLY_OPTION : 1,
+    s.TECHNIQUE_ONLY_POSITION : 2,
+    s.TECHNIQUE_SOLUTION_SET : 10,
+    s.TECHNIQUE_POINTED_SET : 15,
+    s.TECHNIQUE_RESTRICTED_SET : 15,
+    s.TECHNIQUE_X_WING : 30,
+    s.TECHNIQUE_SWORDFISH : 45,
+    s.TECHNIQUE_JELLYFISH : 55,
+    s.TECHNIQUE_Y_WING : 40,
+    s.TECHNIQUE_XYZ_WING : 50,
+    s.TECHNIQUE_W_WING : 50,
+    s.TECHNIQUE_XY_CHAIN : 60,
+    s.TECHNIQUE_SEARCH : 200,
+}
+
+#raised by the sink once the score reaches the threshold, the rest of the solve can't change the answer
+class GradeDecided(Exception):
+    pass
+
+#stands in for the log list and only counts the technique events, nothing is formatted or kept
+class GradingSink:
+
+    def __init__(self, threshold=None):
+        self.counts = [0] * len(s.EVENT_NAMES)
+        self.score = 0
+        self.threshold = threshold
+
+    def append(self, event):
+        self.add(event)
+        if self.threshold is not None and self.score >= self.threshold:
+            raise GradeDecided()
+
+    #counts the event without looking at the threshold
+    def add(self, event):
+        weight = TECHNIQUE_WEIGHTS.get(event[0])
+        if weight is None:
+            return
+        self.counts[event[0]] += 1
+        self.score += weight
+
+#histogram maps technique names to how often they were used, hardest is the heaviest technique that was needed
+#with a threshold the solve stops as soon as the score reaches it and stopped_early is set, the score is then only a lower bound
+def Grade(box_size, puzzle, threshold=None, strategy="all"):
+    sink = GradingSink(threshold)
+    grid = s.CreateSudokuGrid(box_size, strategy=strategy)
+    grid["solution_log"] = sink
+
+    stopped_early = False
+    try:
+        grid = s.LoadGivens(grid, puzzle)
+    except GradeDecided:
+        stopped_early = True
+
+    #the logical techniques stalled, solving the rest would take search
+    #the solve has already run to the end, so passing the threshold here doesn't make it stop early
+    if not stopped_early and not s.IsGridSolved(grid):
+        sink.add((s.TECHNIQUE_SEARCH, 0, ()))
+
+    used = [kind for kind in TECHNIQUE_WEIGHTS if sink.counts[kind] > 0]
+    hardest = max(used, key=lambda kind: TECHNIQUE_WEIGHTS[kind]) if len(used) > 0 else None
+
+    return {"score" : sink.score, "histogram" : {s.EVENT_NAMES[kind] : sink.counts[kind] for kind in used}, "hardest" : s.EVENT_NAMES[hardest] if hardest is not None else None, "stopped_early" : stopped_early}
+
+def GradePuzzleLine(item, threshold=None, strategy="all"):
+    index, line = item
+    result = {"index" : index, "puzzle" : line}
+
+    start = time.perf_counter()
+    try:
+        box_size, puzzle = pio.ParsePuzzleString(line)
+        result.update(Grade(box_size, puzzle, threshold, strategy))
+        result["status"] = "graded"
+    except s.SolveContradiction:
+        result["status"] = "unsolvable"
+    except Exception as e:
+        result["status"] = "invalid"
+        result["error"] = str(e)
+    result["seconds"] = time.perf_counter() - start
+
+    return result
+
+#results come back in input order
+def GradeCorpus(lines, workers, chunk_size, threshold=None, strategy="all"):
+    grade = functools.partial(GradePuzzleLine, threshold=threshold, strategy=strategy)
+    return pio.MapPuzzleLines(grade, lines, workers, chunk_size)
+
+def ParseArguments(argv):
+    parser = argparse.ArgumentParser(description="Grade sudoku puzzles by the techniques their solve needs.")
+    parser.add_argument("inputs", nargs="+", help="puzzle files, one puzzle per line or a grid saved by the GUI")
+    parser.add_argument("-o", "--output", default="-", help="where to write one JSON result per line (default: stdout)")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 1, help="number of worker processes (default: all cores)")
+    parser.add_argument("-c", "--chunk-size", type=int, default=64, help="puzzles handed to a worker at a time (default: 64)")
+    parser.add_argument("-t", "--threshold", type=int, help="stop grading a puzzle as soon as its score reaches this")
+    parser.add_argument("-s", "--strategy", default="all", choices=sorted(s.STRATEGIES.keys()), help="techniques allowed before a puzzle counts as needing search (default: all)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = ParseArguments(argv)
+
+    lines = (line for path in args.inputs for line in pio.ReadPuzzleLines(path))
+    counts = {"graded" : 0, "unsolvable" : 0, "invalid" : 0}
+    start = time.perf_counter()
+
+    with pio.OpenOutput(args.output) as output:
+        for result in GradeCorpus(lines, args.workers, max(1, args.chunk_size), args.threshold, args.strategy):
+            counts[result["status"]] += 1
+            output.write(json.dumps(result) + "\n")
+
+    elapsed = time.perf_counter() - start
+    sys.stderr.write("graded " + str(counts["graded"]) + " unsolvable " + str(counts["unsolvable"]) + " invalid " + str(counts["invalid"]) + " in " + str(round(elapsed, 3)) + " seconds\n")
+
+    return 0 if counts["invalid"] == 0 else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
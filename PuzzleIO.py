@@ -0,0 +1,117 @@
+import contextlib
+import itertools
+import json
+import multiprocessing
+import sys
+
+#numbers past 9 are written as letters, so a 25x25 puzzle still fits one character per cell
+PUZZLE_DIGITS = "123456789ABCDEFGHIJKLMNOP"
+EMPTY_CHARACTERS = ".0"
+
+def BoxSizeForLength(length):
+    for box_size in range(2, 6):
+        if box_size ** 4 == length:
+            return box_size
+    return None
+
+def ParsePuzzleString(text):
+    text = text.strip()
+    if len(text) == 0:
+        raise ValueError("empty puzzle")
+
+    text = text.split()[0]
+
+    box_size = BoxSizeForLength(len(text))
+    if box_size is None:
+        raise ValueError("puzzle length " + str(len(text)) + " is not 16, 81, 256 or 625 characters")
+
+    grid_length = box_size ** 2
+    puzzle = []
+    for x in range(grid_length):
+        row = []
+        for y in range(grid_length):
+            character = text[x * grid_length + y].upper()
+            if character in EMPTY_CHARACTERS:
+                row.append(0)
+                continue
+            number = PUZZLE_DIGITS.find(character) + 1
+            if number < 1 or number > grid_length:
+                raise ValueError("invalid character " + repr(character) + " at row: " + str(x) + " col: " + str(y))
+            row.append(number)
+        puzzle.append(row)
+
+    return box_size, puzzle
+
+def FormatPuzzleString(puzzle):
+    characters = []
+    for row in puzzle:
+        for number in row:
+            if number == 0:
+                characters.append(".")
+            else:
+                characters.append(PUZZLE_DIGITS[number - 1])
+    return "".join(characters)
+
+#the GUI saves {"size": box_size, "grid": rows of {"value", "notes"} cells}
+def ParseSavedGrid(data):
+    box_size = int(data.get("size"))
+    grid_length = box_size ** 2
+
+    puzzle = [[0] * grid_length for _ in range(grid_length)]
+    for x, row_data in enumerate(data.get("grid", [])):
+        for y, cell_data in enumerate(row_data):
+            puzzle[x][y] = int(cell_data.get("value", 0))
+
+    return box_size, puzzle
+
+def ReadSavedGrid(path):
+    with open(path, "r") as f:
+        return ParseSavedGrid(json.load(f))
+
+def IsSavedGridFile(path):
+    if path.lower().endswith(".json"):
+        return True
+    with open(path, "r") as f:
+        return f.read(1) == "{"
+
+#yields the raw text of every puzzle in a corpus file, saved GUI grids are converted to the line format
+def ReadPuzzleLines(path):
+    if IsSavedGridFile(path):
+        box_size, puzzle = ReadSavedGrid(path)
+        yield FormatPuzzleString(puzzle)
+        return
+
+    with open(path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if len(line) == 0 or line.startswith("#"):
+                continue
+            yield line
+
+#"-" is stdout and is left open, anything else is a file closed when the with block ends
+@contextlib.contextmanager
+def OpenOutput(path):
+    if path == "-":
+        yield sys.stdout
+        return
+    with open(path, "w") as output:
+        yield output
+
+#calls function with (index, line) for every line and yields the results in input order
+#the input is handed to the pool in blocks so huge corpora aren't read into memory at once
+def MapPuzzleLines(function, lines, workers, chunk_size):
+    items = enumerate(lines)
+
+    if workers <= 1:
+        for item in items:
+            yield function(item)
+        return
+
+    block_size = workers * chunk_size * 8
+    with multiprocessing.Pool(workers) as pool:
+        while True:
+            block = list(itertools.islice(items, block_size))
+            if len(block) == 0:
+                break
+            for result in pool.imap(function, block, chunk_size):
+                yield result
@@ -0,0 +1,261 @@
+import argparse
+import itertools
+import multiprocessing
+import os
+import sys
+
+import PuzzleIO as pio
+
+#the canonical form comes from individualization and refinement, the way graph canonical labelling works
+#rows, columns and numbers are split into ordered classes by how they meet each other in the givens, and only when that
+#stalls is one row or column singled out and every choice tried, keeping the branch whose splits come out smallest
+#the result is the same for every puzzle reachable by transposing, reordering bands and stacks, reordering rows inside a
+#band and columns inside a stack, and relabelling the numbers
+
+def TransposeGrid(puzzle):
+    return [list(row) for row in zip(*puzzle)]
+
+#vertices 0 to n - 1 are the rows, n to 2n - 1 the columns and 2n to 3n - 1 the numbers
+#mates are the other rows of a row's band or columns of a column's stack, links are the (vertex, vertex) pairs a vertex meets in the givens
+def BuildStructure(box_size, puzzle):
+    grid_length = box_size ** 2
+
+    mates = []
+    for v in range(2 * grid_length):
+        first = v - v % box_size
+        mates.append([m for m in range(first, first + box_size) if m != v])
+    mates += [[] for _ in range(grid_length)]
+
+    links = [[] for _ in range(3 * grid_length)]
+    for r in range(grid_length):
+        for c in range(grid_length):
+            n = puzzle[r][c]
+            if n != 0:
+                column = grid_length + c
+                number = 2 * grid_length + n - 1
+                links[r].append((column, number))
+                links[column].append((r, number))
+                links[number].append((r, column))
+
+    return {"box_size" : box_size, "grid_length" : grid_length, "puzzle" : puzzle, "mates" : mates, "links" : links}
+
+#splits the classes until every vertex in a class sees the same classes, a vertex's colour is the position of its class
+#the trace records every split with the signatures behind it, two branches can only lead to the same form if their traces match
+#with a bound, the best trace so far at this depth, the refinement gives up and returns None as soon as its trace comes out bigger
+def RefinePartition(structure, cells, bound=None):
+    mates = structure["mates"]
+    links = structure["links"]
+    vertex_count = len(mates)
+    colors = [0] * vertex_count
+    trace = []
+
+    while True:
+        for i, cell in enumerate(cells):
+            for v in cell:
+                colors[v] = i
+
+        refined = []
+        for i, cell in enumerate(cells):
+            if len(cell) == 1:
+                refined.append(cell)
+                continue
+
+            #a pair of colours is packed into one int, sorting ints is a lot cheaper than sorting tuples
+            signatures = {v : (tuple(sorted(colors[m] for m in mates[v])), tuple(sorted(colors[a] * vertex_count + colors[b] for a, b in links[v]))) for v in cell}
+            ordered = sorted(cell, key=signatures.__getitem__)
+            if signatures[ordered[0]] == signatures[ordered[-1]]:
+                refined.append(cell)
+                continue
+
+            for signature, group in itertools.groupby(ordered, key=signatures.__getitem__):
+                group = list(group)
+                split = (i, len(group), signature)
+                if bound is not None:
+                    if len(trace) >= len(bound) or split > bound[len(trace)]:
+                        return None, None
+                    if split < bound[len(trace)]:
+                        bound = None
+                trace.append(split)
+                refined.append(group)
+
+        if len(refined) == len(cells):
+            return cells, tuple(trace)
+        cells = refined
+
+#the first class of rows or columns that still has to be split, None once the order is settled
+#rows and columns take turns, in a full grid singling out rows alone splits nothing until a column is singled out too
+#empty rows that share a class can be swapped without changing the puzzle, so they never need a branch, nor do empty columns
+def GetTargetCell(structure, cells):
+    grid_length = structure["grid_length"]
+    links = structure["links"]
+
+    singles = [0, 0]
+    targets = [None, None]
+    for i, cell in enumerate(cells):
+        kind = cell[0] // grid_length
+        if kind > 1:
+            continue
+        if len(cell) == 1:
+            singles[kind] += 1
+        elif targets[kind] is None and len(links[cell[0]]) > 0:
+            targets[kind] = i
+
+    kind = 1 if singles[0] > singles[1] else 0
+    return targets[kind] if targets[kind] is not None else targets[1 - kind]
+
+#bands and stacks go in the order of their lines' colours, numbers are labelled in the order they are first read
+def GetLeafForm(structure, cells):
+    box_size = structure["box_size"]
+    grid_length = structure["grid_length"]
+    puzzle = structure["puzzle"]
+
+    colors = {}
+    for i, cell in enumerate(cells):
+        for v in cell:
+            colors[v] = i
+
+    orders = []
+    for offset in (0, grid_length):
+        lines = [[offset + block * box_size + k for k in range(box_size)] for block in range(box_size)]
+        lines = [sorted(block, key=colors.__getitem__) for block in lines]
+        lines.sort(key=lambda block: [colors[v] for v in block])
+        orders.append([v - offset for block in lines for v in block])
+    rows, columns = orders
+
+    labels = {}
+    form = []
+    for r in rows:
+        row = []
+        for c in columns:
+            n = puzzle[r][c]
+            if n != 0 and n not in labels:
+                labels[n] = len(labels) + 1
+            row.append(labels.get(n, 0))
+        form.append(row)
+
+    return form, rows, columns, labels
+
+#depth first over the choices, a branch is dropped as soon as its traces come out bigger than the best branch's
+def SearchCanonical(structure, cells, path, transpose, best):
+    bound = None
+    if best["path"] is not None:
+        prefix = best["path"][:len(path)]
+        if path > prefix:
+            return
+        if path == prefix:
+            if len(best["path"]) == len(path):
+                return
+            bound = best["path"][len(path)]
+
+    cells, trace = RefinePartition(structure, cells, bound)
+    if cells is None:
+        return
+    path = path + [trace]
+
+    target = GetTargetCell(structure, cells)
+    if target is None:
+        form, rows, columns, labels = GetLeafForm(structure, cells)
+        if best["path"] is None or (path, form) < (best["path"], best["form"]):
+            best["path"] = path
+            best["form"] = form
+            best["transform"] = (transpose, rows, columns, labels)
+        return
+
+    for v in cells[target]:
+        chosen = cells[:target] + [[v], [u for u in cells[target] if u != v]] + cells[target + 1:]
+        SearchCanonical(structure, chosen, path, transpose, best)
+
+#transform is {"transpose", "rows", "columns", "numbers"}, row i of the result is row rows[i] of the (transposed) puzzle
+#read in the order of columns, and numbers[n] is what n becomes
+def Canonicalize(box_size, puzzle):
+    grid_length = box_size ** 2
+    best = {"path" : None, "form" : None, "transform" : None}
+
+    for transpose in (False, True):
+        grid = TransposeGrid(puzzle) if transpose else [list(row) for row in puzzle]
+        cells = [list(range(grid_length)), list(range(grid_length, 2 * grid_length)), list(range(2 * grid_length, 3 * grid_length))]
+        SearchCanonical(BuildStructure(box_size, grid), cells, [], transpose, best)
+
+    transpose, rows, columns, labels = best["transform"]
+    #numbers the puzzle doesn't use get the labels left over, smallest first
+    unused = iter(range(len(labels) + 1, grid_length + 1))
+    numbers = [0] + [labels[n] if n in labels else next(unused) for n in range(1, grid_length + 1)]
+
+    transform = {"transpose" : transpose, "rows" : rows, "columns" : columns, "numbers" : numbers}
+    return best["form"], transform
+
+def ApplyTransform(puzzle, transform):
+    grid = TransposeGrid(puzzle) if transform["transpose"] else puzzle
+    numbers = transform["numbers"]
+    return [[numbers[grid[r][c]] for c in transform["columns"]] for r in transform["rows"]]
+
+#maps a grid in canonical form, a solution of the canonical puzzle say, back onto the original puzzle
+def InvertTransform(canonical, transform):
+    grid_length = len(canonical)
+    numbers = [0] * (grid_length + 1)
+    for n in range(1, grid_length + 1):
+        numbers[transform["numbers"][n]] = n
+
+    grid = [[0] * grid_length for _ in range(grid_length)]
+    for i, r in enumerate(transform["rows"]):
+        for j, c in enumerate(transform["columns"]):
+            grid[r][c] = numbers[canonical[i][j]]
+
+    return TransposeGrid(grid) if transform["transpose"] else grid
+
+#None for a line that isn't a puzzle, it is kept as it is since there is nothing to compare it by
+def CanonicalLine(line):
+    try:
+        box_size, puzzle = pio.ParsePuzzleString(line)
+    except Exception:
+        return None
+    return pio.FormatPuzzleString(Canonicalize(box_size, puzzle)[0])
+
+#yields the first line of every symmetry class in input order, or its canonical form
+def DedupLines(lines, workers=1, chunk_size=16, canonical=False):
+    seen = set()
+    if workers <= 1:
+        keys = map(CanonicalLine, lines)
+    else:
+        lines = list(lines)
+        pool = multiprocessing.Pool(workers)
+        keys = pool.imap(CanonicalLine, lines, chunk_size)
+
+    try:
+        for line, key in zip(lines, keys):
+            if key is None:
+                yield line
+                continue
+            if key in seen:
+                continue
+            seen.add(key)
+            yield key if canonical else line
+    finally:
+        if workers > 1:
+            pool.terminate()
+
+def ParseArguments(argv):
+    parser = argparse.ArgumentParser(description="Drop puzzles that are the same puzzle under a sudoku symmetry.")
+    parser.add_argument("inputs", nargs="+", help="puzzle files, one puzzle per line or a grid saved by the GUI")
+    parser.add_argument("-o", "--output", default="-", help="where to write the puzzles that are kept (default: stdout)")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 1, help="number of worker processes (default: all cores)")
+    parser.add_argument("-c", "--chunk-size", type=int, default=16, help="puzzles handed to a worker at a time (default: 16)")
+    parser.add_argument("--canonical", action="store_true", help="write the canonical form of each puzzle kept instead of the puzzle as it was read")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = ParseArguments(argv)
+
+    lines = [line for path in args.inputs for line in pio.ReadPuzzleLines(path)]
+
+    kept = 0
+    with pio.OpenOutput(args.output) as output:
+        for line in DedupLines(lines, args.workers, max(1, args.chunk_size), args.canonical):
+            output.write(line + "\n")
+            kept += 1
+
+    sys.stderr.write("kept " + str(kept) + " of " + str(len(lines)) + " puzzles\n")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
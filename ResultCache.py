@@ -0,0 +1,114 @@
+import hashlib
+import json
+import os
+import sqlite3
+from collections import OrderedDict
+
+import PuzzleIO as pio
+
+#entries kept in memory per process, the SQLite file has no limit
+CACHE_LIMIT = 10000
+
+#seconds a writer waits for another process to let go of the file
+BUSY_TIMEOUT = 30
+
+#the same box_size and givens always give the same key, however the puzzle was read in
+def PuzzleKey(box_size, puzzle):
+    return hashlib.sha256((str(box_size) + ":" + pio.FormatPuzzleString(puzzle)).encode("ascii")).hexdigest()
+
+#events are stored as [event, number, [cells]] arrays and come back as the tuples the solver logs
+def EncodeLog(log):
+    return json.dumps(list(log), separators=(",", ":"))
+
+def DecodeLog(text):
+    return [(kind, number, tuple(cells)) for kind, number, cells in json.loads(text)]
+
+#solved results by puzzle key, an LRU in memory in front of an optional SQLite file
+#every process opens its own connection, so one file can be shared by a whole worker pool
+class ResultCache:
+
+    def __init__(self, path=None, limit=CACHE_LIMIT):
+        self.path = path
+        self.limit = limit
+        self.memory = OrderedDict()
+        self.connection = None
+        self.pid = None
+        self.stats = {"hits" : 0, "misses" : 0, "memory_hits" : 0, "disk_hits" : 0, "stores" : 0}
+
+    #opened lazily and again after a fork, a connection can't cross into another process
+    def connect(self):
+        if self.path is None:
+            return None
+        if self.connection is not None and self.pid == os.getpid():
+            return self.connection
+
+        self.connection = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT)
+        self.pid = os.getpid()
+        #readers don't block the writer and the other way round
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, box_size INTEGER, solved INTEGER, solution TEXT, log TEXT)")
+        self.connection.commit()
+        return self.connection
+
+    def remember(self, key, result):
+        self.memory[key] = result
+        self.memory.move_to_end(key)
+        if len(self.memory) > self.limit:
+            self.memory.popitem(last=False)
+
+    #{"solved", "solution", "log"} or None, the log is None unless it was stored with one
+    def get(self, box_size, puzzle, need_log=False):
+        return self.lookup(box_size, puzzle, need_log)[0]
+
+    #the result and where it was found, "memory" or "disk", or (None, None) on a miss
+    #with need_log an entry stored without its log counts as a miss, it can't answer the question
+    def lookup(self, box_size, puzzle, need_log=False):
+        key = PuzzleKey(box_size, puzzle)
+
+        result = self.memory.get(key)
+        if result is not None and (result["log"] is not None or not need_log):
+            self.memory.move_to_end(key)
+            self.stats["hits"] += 1
+            self.stats["memory_hits"] += 1
+            return result, "memory"
+
+        connection = self.connect()
+        if connection is not None:
+            row = connection.execute("SELECT solved, solution, log FROM results WHERE key = ?", (key,)).fetchone()
+            if row is not None and (row[2] is not None or not need_log):
+                result = {"solved" : bool(row[0]), "solution" : pio.ParsePuzzleString(row[1])[1] if row[1] is not None else None, "log" : DecodeLog(row[2]) if row[2] is not None else None}
+                self.remember(key, result)
+                self.stats["hits"] += 1
+                self.stats["disk_hits"] += 1
+                return result, "disk"
+
+        self.stats["misses"] += 1
+        return None, None
+
+    #log is the grid's event list, stored compactly as JSON arrays when given
+    def put(self, box_size, puzzle, solved, solution, log=None):
+        key = PuzzleKey(box_size, puzzle)
+        solution = [list(row) for row in solution] if solved else None
+        log = list(log) if log is not None else None
+        self.remember(key, {"solved" : solved, "solution" : solution, "log" : log})
+        self.stats["stores"] += 1
+
+        connection = self.connect()
+        if connection is not None:
+            connection.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)", (key, box_size, int(solved), pio.FormatPuzzleString(solution) if solution is not None else None, EncodeLog(log) if log is not None else None))
+            connection.commit()
+
+    def close(self):
+        if self.connection is not None and self.pid == os.getpid():
+            self.connection.close()
+        self.connection = None
+
+#one cache per file in each process, so pool workers keep their entries between puzzles
+PROCESS_CACHES = {}
+
+def GetProcessCache(path, limit=CACHE_LIMIT):
+    key = (path, limit, os.getpid())
+    if key not in PROCESS_CACHES:
+        PROCESS_CACHES[key] = ResultCache(path, limit)
+    return PROCESS_CACHES[key]
@@ -0,0 +1,226 @@
+import multiprocessing
+import os
+
+import LizardSudokuSolver as s
+
+#singles and the set techniques run between branches, on 25x25 grids the search tree without the sets grows too big to finish
+#the fish, wings and chains cost more per branch than the branches they save
+COUNT_STRATEGY = "basic"
+
+#the top of the search is split into about this many subtrees per worker so a slow subtree doesn't hold up the rest
+SPLIT_FACTOR = 4
+
+#a cell with no candidates left, or a unit with a number that has nowhere left to go
+def IsDeadEnd(grid):
+    geometry = grid["geometry"]
+    candidates = grid["candidates"]
+    solution = grid["solution"]
+    full = (1 << geometry["grid_length"]) - 1
+
+    placed = [0] * geometry["cell_count"]
+    for c in range(geometry["cell_count"]):
+        number = solution[geometry["row_of"][c]][geometry["column_of"][c]]
+        if number != 0:
+            placed[c] = 1 << (number - 1)
+        elif candidates[c] == 0:
+            return True
+
+    for cells in geometry["units"]:
+        covered = 0
+        for c in cells:
+            covered |= candidates[c] | placed[c]
+        if covered != full:
+            return True
+
+    return False
+
+#the empty cell with the fewest candidates, None once every cell is filled
+def GetBranchCell(grid):
+    best = None
+    best_count = 0
+    for c, mask in enumerate(grid["candidates"]):
+        if mask:
+            count = s.PopCount(mask)
+            if best is None or count < best_count:
+                best = c
+                best_count = count
+                if count <= 2:
+                    break
+    return best
+
+#places n + 1 in cell c and lets the techniques run, False if that breaks the puzzle
+def TryPlacement(grid, c, n):
+    geometry = grid["geometry"]
+    try:
+        s.PlaceNumber(grid, n + 1, geometry["row_of"][c], geometry["column_of"][c])
+    except s.SolveContradiction:
+        return False
+    return not IsDeadEnd(grid)
+
+#takes n + 1 out of cell c's candidates and lets the techniques run, False if that breaks the puzzle
+def TryElimination(grid, c, n):
+    try:
+        s.RemoveCandidates(grid, (c,), 1 << n)
+        s.PropagateChecks(grid)
+    except s.SolveContradiction:
+        return False
+    return not IsDeadEnd(grid)
+
+#the givens loaded and propagated, None when they already contradict each other
+def CreateRootGrid(box_size, puzzle, strategy=COUNT_STRATEGY, path=()):
+    grid = s.CreateSudokuGrid(box_size, False, strategy=strategy)
+    grid_length = grid["geometry"]["grid_length"]
+    if len(puzzle) != grid_length or any(len(row) != grid_length for row in puzzle):
+        error = "puzzle is not " + str(grid_length) + "x" + str(grid_length)
+        raise Exception(error)
+
+    try:
+        grid = s.LoadGivens(grid, puzzle)
+    except s.SolveContradiction:
+        return None
+    if IsDeadEnd(grid):
+        return None
+
+    for c, n in path:
+        if not TryPlacement(grid, c, n):
+            return None
+    return grid
+
+#depth first from the grid's current state, every branch is undone with Rollback so the grid ends where it started
+#with a solutions list every solution found is appended to it
+def CountFromGrid(grid, limit, solutions=None):
+    c = GetBranchCell(grid)
+    if c is None:
+        if solutions is not None:
+            solutions.append([list(row) for row in grid["solution"]])
+        return 1
+
+    root = s.Checkpoint(grid)
+    count = 0
+    stack = [(root, s.MaskToNumbers(grid["candidates"][c]), c)]
+
+    try:
+        while len(stack) > 0:
+            mark, numbers, c = stack[-1]
+            if len(numbers) == 0:
+                stack.pop()
+                continue
+
+            s.Rollback(grid, mark)
+            if not TryPlacement(grid, c, numbers.pop()):
+                continue
+
+            next_cell = GetBranchCell(grid)
+            if next_cell is None:
+                if solutions is not None:
+                    solutions.append([list(row) for row in grid["solution"]])
+                count += 1
+                if count >= limit:
+                    return count
+            else:
+                stack.append((s.Checkpoint(grid), s.MaskToNumbers(grid["candidates"][next_cell]), next_cell))
+    finally:
+        s.Rollback(grid, root)
+
+    return count
+
+#breadth first from the root until there are at least target open subtrees, each one is the list of placements that leads to it
+#subtrees that turn out to be solved on the way are counted straight away
+def SplitSearch(grid, target, limit):
+    frontier = [()]
+    solved = 0
+
+    while 0 < len(frontier) < target:
+        expanded = []
+        for path in frontier:
+            mark = s.Checkpoint(grid)
+            for c, n in path:
+                TryPlacement(grid, c, n)
+
+            c = GetBranchCell(grid)
+            for n in s.MaskToNumbers(grid["candidates"][c]):
+                branch = s.Checkpoint(grid)
+                if TryPlacement(grid, c, n):
+                    if GetBranchCell(grid) is None:
+                        solved += 1
+                    else:
+                        expanded.append(path + ((c, n),))
+                s.Rollback(grid, branch)
+
+            s.Rollback(grid, mark)
+            if solved >= limit:
+                return [], solved
+        frontier = expanded
+
+    return frontier, solved
+
+def CountSubtree(item):
+    box_size, puzzle, path, limit, strategy = item
+    grid = CreateRootGrid(box_size, puzzle, strategy, path)
+    if grid is None:
+        return 0
+    return CountFromGrid(grid, limit)
+
+#number of solutions, counting stops at limit so the answer is really min(solutions, limit)
+#processes above 1 hands subtrees of the top levels to a pool, None uses every core
+def CountSolutions(box_size, puzzle, limit=2, processes=1, strategy=COUNT_STRATEGY):
+    if limit < 1:
+        raise Exception("limit must be at least 1")
+    if processes is None:
+        processes = os.cpu_count() or 1
+
+    grid = CreateRootGrid(box_size, puzzle, strategy)
+    if grid is None:
+        return 0
+    if GetBranchCell(grid) is None:
+        return 1
+    if processes <= 1:
+        return CountFromGrid(grid, limit)
+
+    frontier, count = SplitSearch(grid, processes * SPLIT_FACTOR, limit)
+    if count >= limit or len(frontier) == 0:
+        return min(count, limit)
+
+    items = [(box_size, puzzle, path, limit - count, strategy) for path in frontier]
+    with multiprocessing.Pool(min(processes, len(items))) as pool:
+        for found in pool.imap_unordered(CountSubtree, items):
+            count += found
+            if count >= limit:
+                return limit
+
+    return count
+
+def HasUniqueSolution(box_size, puzzle, processes=1, strategy=COUNT_STRATEGY):
+    return CountSolutions(box_size, puzzle, 2, processes, strategy) == 1
+
+#the puzzle's solution, None when it has none or more than one
+def GetUniqueSolution(box_size, puzzle, strategy=COUNT_STRATEGY):
+    grid = CreateRootGrid(box_size, puzzle, strategy)
+    if grid is None:
+        return None
+    solutions = []
+    if CountFromGrid(grid, 2, solutions) != 1:
+        return None
+    return solutions[0]
+
+#for a puzzle that had only this solution before the cells were emptied, any other solution has to differ from it in one of them
+#cell by cell, its number is taken out and one solution is searched for, then it is put back for the cells after it
+#that is one search per cell with the branch a full count would spend on the old solution already cut off
+def HasOtherSolution(box_size, puzzle, solution, cells, strategy=COUNT_STRATEGY):
+    grid = CreateRootGrid(box_size, puzzle, strategy)
+    if grid is None:
+        return False
+    grid_length = grid["geometry"]["grid_length"]
+
+    for x, y in cells:
+        c = x * grid_length + y
+        #the techniques already settled this cell, every solution has its number there
+        if grid["candidates"][c] == 0:
+            continue
+        mark = s.Checkpoint(grid)
+        if TryElimination(grid, c, solution[x][y] - 1) and CountFromGrid(grid, 1) > 0:
+            return True
+        s.Rollback(grid, mark)
+        if not TryPlacement(grid, c, solution[x][y] - 1):
+            return False
+    return False
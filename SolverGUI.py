@@ -1,7 +1,9 @@
 
 import LizardSudokuSolver as s
+import DancingLinksSolver as dlx
 import sys
 import json
+import time
 from PySide6.QtWidgets import (
     QApplication,
     QMainWindow,
@@ -27,7 +29,7 @@ from PySide6.QtGui import (
     QMouseEvent,
     QKeyEvent,
 )
-from PySide6.QtCore import Qt, Signal, Slot
+from PySide6.QtCore import Qt, Signal, Slot, QObject, QThread
 
 
 class SudokuCell(QFrame):
@@ -204,6 +206,85 @@ class SolutionLogWindow(QDialog):
         layout.addWidget(log_display)
         self.setLayout(layout)
 
+#runs a solve on its own thread, the engine calls report between techniques which is where cancelling takes effect
+class SolverWorker(QObject):
+
+    progress = Signal(int, str)
+    finished = Signal(object, bool)
+    cancelled = Signal()
+    failed = Signal(str)
+
+    #seconds between progress signals, the engine calls report far more often than the window can repaint
+    PROGRESS_INTERVAL = 0.1
+
+    def __init__(self, size, puzzle):
+        super().__init__()
+        self.size = size
+        self.puzzle = puzzle
+        self.cancel_requested = False
+        self.last_report = 0
+
+    @Slot()
+    def run(self):
+        try:
+            grid = s.CreateSudokuGrid(self.size)
+            s.SetProgressHook(grid, self.report)
+            result, ok = self.work(grid)
+            s.SetProgressHook(grid, None)
+        except s.SolveCancelled:
+            self.cancelled.emit()
+            return
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+
+        self.finished.emit(result, ok)
+
+    #the logical techniques can stall on hard puzzles, search finishes whatever is left
+    def work(self, grid):
+        return dlx.LoadAndSolve(grid, self.puzzle)
+
+    def report(self, grid, stage):
+        if self.cancel_requested:
+            raise s.SolveCancelled()
+
+        now = time.monotonic()
+        if now - self.last_report < self.PROGRESS_INTERVAL:
+            return
+        self.last_report = now
+
+        placed = 0
+        for row in grid["solution"]:
+            for number in row:
+                if number != 0:
+                    placed += 1
+        self.progress.emit(placed, stage)
+
+    #called straight from the UI thread, the worker's own event loop is busy solving
+    def cancel(self):
+        self.cancel_requested = True
+
+#finds the first number the techniques place in an empty cell instead of solving
+#finished gets the hint, or None when the techniques stall, and False when the givens contradict each other
+class HintWorker(SolverWorker):
+
+    def work(self, grid):
+        geometry = grid["geometry"]
+        reason = None
+        try:
+            for event in s.IterSteps(grid, self.puzzle):
+                kind, number, cells = event
+                if kind == s.LOG_PLACE:
+                    x = geometry["row_of"][cells[0]]
+                    y = geometry["column_of"][cells[0]]
+                    if self.puzzle[x][y] == 0:
+                        return {"row" : x, "col" : y, "number" : number, "reason" : s.RenderLogEvent(geometry, reason)[0] if reason is not None else None}, True
+                elif kind != s.LOG_ELIMINATE:
+                    reason = event
+        except s.SolveContradiction:
+            return None, False
+        return None, True
+
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -222,6 +303,11 @@ class MainWindow(QMainWindow):
         self.generate_button.clicked.connect(self.generate_grid)
         self.solve_button = QPushButton("Solve")
         self.solve_button.clicked.connect(self.solve_puzzle)
+        self.cancel_button = QPushButton("Cancel")
+        self.cancel_button.clicked.connect(self.cancel_solve)
+        self.cancel_button.setEnabled(False)
+        self.hint_button = QPushButton("Hint")
+        self.hint_button.clicked.connect(self.show_hint)
         self.log_button = QPushButton("Show Log")
         self.log_button.clicked.connect(self.show_log)
         self.load_button = QPushButton("Load Grid")
@@ -235,6 +321,8 @@ class MainWindow(QMainWindow):
         top_controls_layout.addWidget(self.generate_button)
         top_controls_layout.addStretch()
         top_controls_layout.addWidget(self.solve_button)
+        top_controls_layout.addWidget(self.cancel_button)
+        top_controls_layout.addWidget(self.hint_button)
         top_controls_layout.addWidget(self.log_button)
         top_controls_layout.addWidget(self.load_button)
         top_controls_layout.addWidget(self.save_button)
@@ -244,8 +332,14 @@ class MainWindow(QMainWindow):
         self.grid_layout_container = QVBoxLayout(self.sudoku_grid_container)
         self.main_layout.addWidget(self.sudoku_grid_container)
 
+        self.status_label = QLabel("")
+        self.main_layout.addWidget(self.status_label)
+
         self.sudoku_grid = None
-        self.solution_log = "Solver has not been run yet."
+        #the log text is only built when someone opens it
+        self.solved_grid = None
+        self.solver_thread = None
+        self.solver_worker = None
         
         self.setStyleSheet("""
             QMainWindow { background-color: #e8e8e8; }
@@ -329,30 +423,122 @@ class MainWindow(QMainWindow):
                     cell_widget.set_notes(notes)
 
     def solve_puzzle(self):
-        if not self.sudoku_grid:
+        if not self.sudoku_grid or self.solver_thread is not None:
             return
-            
-        puzzle_data = self.sudoku_grid.data
 
-        grid = s.CreateSudokuGrid(self.sudoku_grid.size)
+        #the worker gets its own copy so editing the grid can't change the puzzle under it
+        puzzle_data = [list(row) for row in self.sudoku_grid.data]
+        self.start_worker(SolverWorker(self.sudoku_grid.size, puzzle_data), self.solve_finished)
+        self.status_label.setText("Solving...")
+
+    #the hint runs on the worker thread too, on a big grid the techniques can take as long as a solve
+    def show_hint(self):
+        if not self.sudoku_grid or self.solver_thread is not None:
+            return
 
+        puzzle_data = [list(row) for row in self.sudoku_grid.data]
+        self.start_worker(HintWorker(self.sudoku_grid.size, puzzle_data), self.hint_finished)
+        self.status_label.setText("Looking for a hint...")
+
+    def start_worker(self, worker, finished):
+        self.solver_thread = QThread(self)
+        self.solver_worker = worker
+        self.solver_worker.moveToThread(self.solver_thread)
+
+        self.solver_thread.started.connect(self.solver_worker.run)
+        self.solver_worker.progress.connect(self.solve_progress)
+        self.solver_worker.finished.connect(finished)
+        self.solver_worker.cancelled.connect(self.solve_cancelled)
+        self.solver_worker.failed.connect(self.solve_failed)
+        for signal in (self.solver_worker.finished, self.solver_worker.cancelled, self.solver_worker.failed):
+            signal.connect(self.solver_thread.quit)
+        self.solver_thread.finished.connect(self.solver_thread_done)
+
+        self.set_solving(True)
+        self.solver_thread.start()
+
+    def set_solving(self, solving):
+        self.solve_button.setEnabled(not solving)
+        self.hint_button.setEnabled(not solving)
+        self.generate_button.setEnabled(not solving)
+        self.load_button.setEnabled(not solving)
+        self.cancel_button.setEnabled(solving)
+        if self.sudoku_grid:
+            self.sudoku_grid.setEnabled(not solving)
 
-        for i in range(len(puzzle_data)):
-            for j in range(len(puzzle_data)):
-                if puzzle_data[i][j] != 0:
-                    grid = s.PlaceNumber(grid, puzzle_data[i][j], i, j)
+    def cancel_solve(self):
+        if self.solver_worker is not None:
+            self.solver_worker.cancel()
+            self.status_label.setText("Cancelling...")
 
-        solution_steps = grid["solution_log"]
+    @Slot(int, str)
+    def solve_progress(self, placed, stage):
+        total = len(self.sudoku_grid.data) ** 2
+        self.status_label.setText("Placed " + str(placed) + " of " + str(total) + " cells, running " + stage)
 
+    @Slot(object, bool)
+    def solve_finished(self, grid, solved):
+        puzzle_data = self.sudoku_grid.data
+
+        #repaint once at the end instead of once per cell
+        self.sudoku_grid.setUpdatesEnabled(False)
         for i in range(len(puzzle_data)):
             for j in range(len(puzzle_data)):
                 self.sudoku_grid.cells[i][j].set_value(grid["solution"][i][j])
+        self.sudoku_grid.setUpdatesEnabled(True)
 
-        self.solution_log = "\n".join(solution_steps)
+        self.solved_grid = grid
+        self.status_label.setText("Solved." if solved else "No solution.")
+        if not solved:
+            QMessageBox.warning(self, "No Solution", "This puzzle has no solution.")
         print("Solver finished.")
 
+    #the hint is only pointed out, the number is left for the player to enter
+    @Slot(object, bool)
+    def hint_finished(self, hint, consistent):
+        if not consistent:
+            self.status_label.setText("No hint, this puzzle has no solution.")
+            return
+        if hint is None:
+            self.status_label.setText("No hint, the techniques can't place another number.")
+            return
+
+        self.sudoku_grid.cell_clicked(hint["row"], hint["col"])
+        text = "Hint: " + str(hint["number"]) + " at row: " + str(hint["row"]) + " col: " + str(hint["col"])
+        if hint["reason"] is not None:
+            text += ", " + hint["reason"]
+        self.status_label.setText(text)
+
+    @Slot()
+    def solve_cancelled(self):
+        self.status_label.setText("Solve cancelled.")
+
+    @Slot(str)
+    def solve_failed(self, error):
+        self.status_label.setText("Solve failed.")
+        QMessageBox.critical(self, "Error", "The solver stopped: " + error)
+
+    @Slot()
+    def solver_thread_done(self):
+        self.solver_thread.deleteLater()
+        self.solver_worker.deleteLater()
+        self.solver_thread = None
+        self.solver_worker = None
+        self.set_solving(False)
+
+    def closeEvent(self, event):
+        if self.solver_thread is not None:
+            self.solver_worker.cancel()
+            self.solver_thread.quit()
+            self.solver_thread.wait()
+        super().closeEvent(event)
+
     def show_log(self):
-        log_window = SolutionLogWindow(self.solution_log, self)
+        if self.solved_grid is None:
+            solution_log = "Solver has not been run yet."
+        else:
+            solution_log = "\n".join(s.RenderSolutionLog(self.solved_grid))
+        log_window = SolutionLogWindow(solution_log, self)
         log_window.exec()
 
 
@@ -0,0 +1,43 @@
+import os
+import random
+
+import PuzzleGenerator as pg
+import PuzzleIO as pio
+
+CORPUS_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus")
+
+#every puzzle has a single solution and is minimized so its tier's strategy still solves it without search
+#a tier gets the hardest puzzle its strategy allows, GeneratePuzzle retries grids that come out easier
+TIERS = ("easy", "medium", "hard")
+TIER_STRATEGIES = {"easy" : "singles", "medium" : "basic", "hard" : "all"}
+CORPUS_SIZES = {2 : 40, 3 : 10, 4 : 3, 5 : 1}
+
+#the seed only depends on the size, tier and position so the corpus can be rebuilt byte for byte
+def GenerateTier(box_size, tier, count):
+    puzzles = []
+    for i in range(count):
+        rng = random.Random("box" + str(box_size) + "-" + tier + "-" + str(i))
+        puzzles.append(pg.GeneratePuzzle(box_size, rng, strategy=TIER_STRATEGIES[tier]))
+    return puzzles
+
+def GetCorpusPath(box_size, tier):
+    return os.path.join(CORPUS_DIRECTORY, "box" + str(box_size) + "_" + tier + ".txt")
+
+def WriteCorpus(directory=CORPUS_DIRECTORY):
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for box_size in sorted(CORPUS_SIZES.keys()):
+        for tier in TIERS:
+            path = os.path.join(directory, os.path.basename(GetCorpusPath(box_size, tier)))
+            with open(path, "w") as f:
+                f.write("# box_size " + str(box_size) + " " + tier + ", unique puzzles minimized for the " + TIER_STRATEGIES[tier] + " strategy, regenerate with python -m benchmarks corpus\n")
+                for puzzle in GenerateTier(box_size, tier, CORPUS_SIZES[box_size]):
+                    f.write(pio.FormatPuzzleString(puzzle) + "\n")
+            paths.append(path)
+    return paths
+
+def LoadTier(box_size, tier):
+    puzzles = []
+    for line in pio.ReadPuzzleLines(GetCorpusPath(box_size, tier)):
+        puzzles.append(pio.ParsePuzzleString(line)[1])
+    return puzzles
@@ -0,0 +1,111 @@
+import json
+import platform
+import statistics
+import sys
+import time
+
+import LizardSudokuSolver as s
+import DancingLinksSolver as dlx
+import NumpyBackend as nb
+from benchmarks import BenchmarkCorpus as corpus
+
+#givens placed with propagation held back, so every technique has something left to find
+def CreateUnpropagatedGrid(box_size, puzzle):
+    grid = s.CreateSudokuGrid(box_size, False)
+    grid["propagating"] = True
+    return s.LoadGivens(grid, puzzle)
+
+#CloneGrid clears the propagating flag, it is set again so a timed technique doesn't also drain the checks queued by the givens
+def CloneUnpropagatedGrid(grid):
+    clone = s.CloneGrid(grid)
+    clone["propagating"] = True
+    return clone
+
+def RunTechnique(grid, function, scope):
+    geometry = grid["geometry"]
+    if scope == "unit":
+        for unit in range(len(geometry["units"])):
+            function(grid, unit)
+    elif scope == "box":
+        for x_min, y_min in geometry["box_origins"]:
+            function(grid, x_min, y_min)
+    elif scope == "number":
+        for n in range(geometry["grid_length"]):
+            function(grid, n)
+    elif scope == "grid":
+        function(grid)
+
+def SolvePuzzle(box_size, puzzle):
+    grid = s.LoadGivens(s.CreateSudokuGrid(box_size, False), puzzle)
+    return dlx.SolveWithDancingLinks(grid)
+
+#setup is not timed, it builds whatever state the timed run needs
+def TimeRuns(setup, run, warmup, repeat):
+    for _ in range(warmup):
+        run(setup())
+
+    times = []
+    for _ in range(repeat):
+        state = setup()
+        start = time.perf_counter()
+        run(state)
+        times.append(time.perf_counter() - start)
+
+    return {"min" : min(times), "median" : statistics.median(times), "mean" : statistics.mean(times), "stdev" : statistics.stdev(times) if len(times) > 1 else 0.0, "repeat" : len(times)}
+
+def BenchmarkTier(box_size, tier, warmup, repeat, techniques=True):
+    puzzles = corpus.LoadTier(box_size, tier)
+    results = {}
+
+    results["create"] = TimeRuns(lambda: None, lambda state: [s.CreateSudokuGrid(box_size, False) for _ in puzzles], warmup, repeat)
+    results["place"] = TimeRuns(lambda: [s.CreateSudokuGrid(box_size, False) for _ in puzzles], lambda grids: [s.LoadGivens(grid, puzzle) for grid, puzzle in zip(grids, puzzles)], warmup, repeat)
+    results["solve"] = TimeRuns(lambda: None, lambda state: [SolvePuzzle(box_size, puzzle) for puzzle in puzzles], warmup, repeat)
+    if nb.NUMPY_AVAILABLE:
+        results["solve.numpy"] = TimeRuns(lambda: None, lambda state: [dlx.SolveWithDancingLinks(nb.SolveWithNumpy(box_size, puzzle, False)) for puzzle in puzzles], warmup, repeat)
+
+    if techniques:
+        start_grids = [CreateUnpropagatedGrid(box_size, puzzle) for puzzle in puzzles]
+        for name, (function, scope) in s.TECHNIQUES.items():
+            results["technique." + name] = TimeRuns(lambda: [CloneUnpropagatedGrid(grid) for grid in start_grids], lambda grids: [RunTechnique(grid, function, scope) for grid in grids], warmup, repeat)
+
+    return results
+
+def RunBenchmarks(box_sizes, tiers, warmup, repeat, techniques=True, progress=None):
+    results = {}
+    for box_size in box_sizes:
+        for tier in tiers:
+            if progress is not None:
+                progress.write("box_size " + str(box_size) + " " + tier + "\n")
+                progress.flush()
+            for measurement, timing in BenchmarkTier(box_size, tier, warmup, repeat, techniques).items():
+                results["box" + str(box_size) + "." + tier + "." + measurement] = timing
+
+    return {"python" : platform.python_version(), "platform" : platform.platform(), "created" : time.strftime("%Y-%m-%dT%H:%M:%S"), "warmup" : warmup, "repeat" : repeat, "results" : results}
+
+def SaveResults(results, path):
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+
+def LoadResults(path):
+    with open(path, "r") as f:
+        return json.load(f)
+
+#medians are compared, a measurement is a regression when the new run is slower by more than threshold
+def CompareResults(old, new, threshold):
+    rows = []
+    for key in sorted(set(old["results"].keys()) & set(new["results"].keys())):
+        old_time = old["results"][key]["median"]
+        new_time = new["results"][key]["median"]
+        ratio = new_time / old_time if old_time > 0 else float("inf")
+        if ratio > 1 + threshold:
+            status = "regression"
+        elif ratio < 1 - threshold:
+            status = "improvement"
+        else:
+            status = "same"
+        rows.append({"measurement" : key, "old" : old_time, "new" : new_time, "ratio" : ratio, "status" : status})
+    return rows
+
+def PrintComparison(rows, stream=sys.stdout):
+    for row in rows:
+        stream.write(row["measurement"].ljust(40) + " " + ("%.6f" % row["old"]).rjust(12) + " " + ("%.6f" % row["new"]).rjust(12) + " " + ("%.2fx" % row["ratio"]).rjust(8) + "  " + row["status"] + "\n")
@@ -0,0 +1,49 @@
+import argparse
+import sys
+
+from benchmarks import BenchmarkCorpus as corpus
+from benchmarks import BenchmarkSuite as suite
+
+def ParseArguments(argv):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Time the solver against the seeded puzzle corpus.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="time the solver and save the results as JSON")
+    run.add_argument("-o", "--output", default="benchmark.json", help="where to save the results (default: benchmark.json)")
+    run.add_argument("-s", "--sizes", type=int, nargs="+", default=[2, 3, 4], choices=sorted(corpus.CORPUS_SIZES.keys()), help="box sizes to run (default: 2 3 4, box_size 5 takes minutes)")
+    run.add_argument("-t", "--tiers", nargs="+", default=list(corpus.TIERS), choices=corpus.TIERS, help="difficulty tiers to run (default: all)")
+    run.add_argument("-w", "--warmup", type=int, default=1, help="untimed runs before measuring (default: 1)")
+    run.add_argument("-r", "--repeat", type=int, default=5, help="timed runs per measurement (default: 5)")
+    run.add_argument("--no-techniques", action="store_true", help="only time the grid creation, placement cascade and full solve")
+
+    compare = commands.add_parser("compare", help="compare two saved runs and flag regressions")
+    compare.add_argument("old", help="results of the baseline run")
+    compare.add_argument("new", help="results of the run to check")
+    compare.add_argument("--threshold", type=float, default=0.1, help="relative slowdown of the median that counts as a regression (default: 0.1)")
+
+    commands.add_parser("corpus", help="regenerate the puzzle corpus from its seeds")
+
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = ParseArguments(argv)
+
+    if args.command == "corpus":
+        for path in corpus.WriteCorpus():
+            print(path)
+        return 0
+
+    if args.command == "run":
+        results = suite.RunBenchmarks(args.sizes, args.tiers, max(0, args.warmup), max(1, args.repeat), not args.no_techniques, sys.stderr)
+        suite.SaveResults(results, args.output)
+        print("saved " + str(len(results["results"])) + " measurements to " + args.output)
+        return 0
+
+    rows = suite.CompareResults(suite.LoadResults(args.old), suite.LoadResults(args.new), args.threshold)
+    suite.PrintComparison(rows)
+    regressions = [row for row in rows if row["status"] == "regression"]
+    print(str(len(regressions)) + " regressions of " + str(len(rows)) + " measurements")
+    return 1 if len(regressions) > 0 else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
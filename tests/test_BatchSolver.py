@@ -0,0 +1,25 @@
+import pytest
+
+import BatchSolver as bs
+import LizardSudokuSolver as s
+import PuzzleIO as pio
+
+#givens that fit together but clash once propagation runs, the top left cell can only be 1 and its column has one
+CONTRADICTION = ".23456789" + "." * 18 + "1" + "." * 53
+
+@pytest.mark.parametrize("line, status", [
+    (CONTRADICTION, "unsolvable"),
+    ("11" + "." * 79, "invalid"),
+    ("." * 80, "invalid"),
+    ("." * 81, "solved"),
+])
+def test_status(line, status):
+    result = bs.SolvePuzzleLine((0, line))
+    assert result["status"] == status
+    assert (result["solution"] is not None) == (status == "solved")
+
+def test_contradiction_logs_no_solution():
+    box_size, puzzle = pio.ParsePuzzleString(CONTRADICTION)
+    grid, solved = bs.SolvePuzzle(box_size, puzzle, keep_log=True)
+    assert not solved
+    assert grid["solution_log"][-1][0] == s.LOG_NO_SOLUTION
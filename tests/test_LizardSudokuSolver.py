@@ -0,0 +1,209 @@
+import io
+import json
+import os
+import random
+
+import pytest
+
+import DancingLinksSolver as dlx
+import LizardSudokuSolver as s
+import PuzzleIO as pio
+from benchmarks import BenchmarkCorpus as corpus
+
+#solutions and the candidates the techniques leave behind for every corpus puzzle
+#python -m tests.test_LizardSudokuSolver writes it again after a change that is meant to alter them
+EXPECTED_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "corpus_expected.json")
+
+CORPUS = [(box_size, tier) for box_size in corpus.CORPUS_SIZES for tier in corpus.TIERS]
+
+def SolveCorpusPuzzle(box_size, puzzle):
+    grid = s.LoadGivens(s.CreateSudokuGrid(box_size, False), puzzle)
+    candidates = list(grid["candidates"])
+    grid, solved = dlx.SolveWithDancingLinks(grid)
+    return {"solution" : pio.FormatPuzzleString(grid["solution"]) if solved else None, "candidates" : candidates}
+
+def WriteExpected():
+    expected = {}
+    for box_size, tier in CORPUS:
+        expected[str(box_size) + "_" + tier] = [SolveCorpusPuzzle(box_size, puzzle) for puzzle in corpus.LoadTier(box_size, tier)]
+    os.makedirs(os.path.dirname(EXPECTED_PATH), exist_ok=True)
+    with open(EXPECTED_PATH, "w") as f:
+        json.dump(expected, f, separators=(",", ":"))
+        f.write("\n")
+
+@pytest.fixture(scope="module")
+def expected():
+    with open(EXPECTED_PATH) as f:
+        return json.load(f)
+
+def IsValidSolution(box_size, solution, puzzle):
+    grid_length = box_size ** 2
+    numbers = set(range(1, grid_length + 1))
+    geometry = s.GetGridGeometry(box_size)
+    for cells in geometry["units"]:
+        if {solution[geometry["row_of"][c]][geometry["column_of"][c]] for c in cells} != numbers:
+            return False
+    return all(puzzle[x][y] in (0, solution[x][y]) for x in range(grid_length) for y in range(grid_length))
+
+@pytest.mark.parametrize("box_size, tier", CORPUS)
+def test_corpus_matches_pinned_results(box_size, tier, expected):
+    for puzzle, pinned in zip(corpus.LoadTier(box_size, tier), expected[str(box_size) + "_" + tier]):
+        result = SolveCorpusPuzzle(box_size, puzzle)
+        solution = pio.ParsePuzzleString(result["solution"])[1]
+
+        assert IsValidSolution(box_size, solution, puzzle)
+        #the techniques never remove the number that ends up in a cell
+        for c, mask in enumerate(result["candidates"]):
+            x, y = divmod(c, box_size ** 2)
+            assert mask == 0 or mask & (1 << (solution[x][y] - 1))
+        assert result == pinned
+
+def GetState(grid):
+    return (list(grid["candidates"]), [list(row) for row in grid["solution"]], [set(cells) for cells in grid["bivalue_cells"]], {mask : set(cells) for mask, cells in grid["pair_cells"].items()}, list(grid["solution_log"]))
+
+@pytest.mark.parametrize("box_size", [2, 3, 4])
+def test_rollback_restores_checkpoint(box_size):
+    rng = random.Random(box_size)
+    #only the first band's givens, so the singles leave cells open to place into
+    puzzle = [row if x < box_size else [0] * len(row) for x, row in enumerate(corpus.LoadTier(box_size, "hard")[0])]
+    grid = s.LoadGivens(s.CreateSudokuGrid(box_size, strategy="singles"), puzzle)
+    before = GetState(grid)
+    mark = s.Checkpoint(grid)
+
+    for _ in range(5):
+        open_cells = [c for c, mask in enumerate(grid["candidates"]) if mask]
+        if len(open_cells) == 0:
+            break
+        c = rng.choice(open_cells)
+        number = rng.choice(s.MaskToNumbers(grid["candidates"][c])) + 1
+        inner = s.Checkpoint(grid)
+        try:
+            s.PlaceNumber(grid, number, c // box_size ** 2, c % box_size ** 2)
+        except s.SolveContradiction:
+            s.Rollback(grid, inner)
+
+    assert GetState(grid) != before
+    s.Rollback(grid, mark)
+    assert GetState(grid) == before
+    assert GetState(s.RebuildBivalueIndex(grid)) == before
+
+def test_clone_is_independent():
+    puzzle = corpus.LoadTier(3, "hard")[0]
+    grid = s.LoadGivens(s.CreateSudokuGrid(3, strategy="singles"), puzzle)
+    before = GetState(grid)
+    clone = s.CloneGrid(grid)
+
+    dlx.SolveWithDancingLinks(clone)
+    assert s.IsGridSolved(clone)
+    assert GetState(grid) == before
+
+#needs the set techniques, the singles alone stall on it
+BASIC_PUZZLE = ".....6..17...53...5.2...6...64....8.17...495.........3.3.9........721....8......."
+
+def LoadPuzzleString(line, keep_log=True, strategy="all"):
+    box_size, puzzle = pio.ParsePuzzleString(line)
+    return s.LoadGivens(s.CreateSudokuGrid(box_size, keep_log, strategy=strategy), puzzle), puzzle
+
+def test_iter_steps_yields_the_whole_log():
+    full, puzzle = LoadPuzzleString(BASIC_PUZZLE)
+    grid = s.CreateSudokuGrid(3)
+    assert list(s.IterSteps(grid, puzzle)) == full["solution_log"]
+    assert grid["solution_log"] == full["solution_log"]
+    assert not grid["propagating"]
+
+#stopping after a few events leaves the rest queued, PropagateChecks then ends where a full solve does
+@pytest.mark.parametrize("steps", [1, 10, 100])
+def test_iter_steps_stopped_early_resumes(steps):
+    full, puzzle = LoadPuzzleString(BASIC_PUZZLE)
+    grid = s.CreateSudokuGrid(3)
+    events = s.IterSteps(grid, puzzle)
+    taken = [next(events) for _ in range(steps)]
+    events.close()
+
+    assert taken == full["solution_log"][:steps]
+    assert not grid["propagating"]
+    assert not s.IsGridSolved(grid)
+
+    s.PropagateChecks(grid)
+    assert grid["solution"] == full["solution"]
+    assert grid["candidates"] == full["candidates"]
+    assert grid["solution_log"] == full["solution_log"]
+
+def test_resolve_strategy():
+    assert s.ResolveStrategy("basic") == s.STRATEGIES["basic"]
+    assert s.ResolveStrategy("none") == ()
+    assert s.ResolveStrategy(["only_options", (), ("sets", "fish")]) == (("only_options",), ("sets", "fish"))
+
+@pytest.mark.parametrize("strategy", ["everything", ["only_options", "no_such_technique"], [("sets", "no_such_technique")]])
+def test_resolve_strategy_rejects_unknown_names(strategy):
+    with pytest.raises(Exception):
+        s.ResolveStrategy(strategy)
+    with pytest.raises(Exception):
+        s.CreateSudokuGrid(3, strategy=strategy)
+
+#each profile only gets as far as its techniques allow, and never past the solution
+@pytest.mark.parametrize("strategy, solved", [("none", False), ("singles", False), ("basic", True), ("no-chains", True), ("all", True)])
+def test_strategy_profiles(strategy, solved):
+    full = LoadPuzzleString(BASIC_PUZZLE)[0]
+    grid, puzzle = LoadPuzzleString(BASIC_PUZZLE, strategy=strategy)
+    assert s.IsGridSolved(grid) == solved
+    for c, mask in enumerate(grid["candidates"]):
+        x, y = divmod(c, 9)
+        assert grid["solution"][x][y] in (0, full["solution"][x][y])
+        assert mask == 0 or mask & (1 << (full["solution"][x][y] - 1))
+    if strategy == "none":
+        assert grid["solution"] == puzzle
+
+def test_stats_count_every_placement():
+    box_size, puzzle = pio.ParsePuzzleString(BASIC_PUZZLE)
+    grid = s.LoadGivens(s.EnableStats(s.CreateSudokuGrid(box_size, False)), puzzle)
+    stats = s.GetStats(grid)
+
+    assert set(stats.keys()) <= {function.__name__ for function, scope in s.TECHNIQUES.values()}
+    assert all(set(counters.keys()) == set(s.STAT_FIELDS) for counters in stats.values())
+    assert all(counters["calls"] >= counters["no_change_calls"] for counters in stats.values())
+    #every number that isn't a given is placed by some technique
+    assert sum(counters["placements"] for counters in stats.values()) == BASIC_PUZZLE.count(".")
+    assert grid["stats"]["placements"] == 81
+
+    assert s.GetStats(s.CreateSudokuGrid(box_size, False)) == {}
+
+def test_stats_merge_and_csv():
+    box_size, puzzle = pio.ParsePuzzleString(BASIC_PUZZLE)
+    stats = s.GetStats(s.LoadGivens(s.EnableStats(s.CreateSudokuGrid(box_size, False)), puzzle))
+    total = s.MergeStats(s.MergeStats({}, stats), stats)
+    assert all(total[name]["calls"] == 2 * stats[name]["calls"] for name in stats)
+
+    lines = s.StatsToCsv(total).splitlines()
+    assert lines[0] == "technique," + ",".join(s.STAT_FIELDS)
+    assert [line.split(",")[0] for line in lines[1:]] == sorted(total.keys())
+    for line in lines[1:]:
+        fields = line.split(",")
+        assert [float(value) for value in fields[1:]] == [total[fields[0]][field] for field in s.STAT_FIELDS]
+    assert json.loads(s.StatsToJson(total)) == total
+
+def test_render_solution_log():
+    grid = LoadPuzzleString(BASIC_PUZZLE)[0]
+    lines = s.RenderSolutionLog(grid)
+    #the givens are placed and logged like every other number
+    places = [line for line in lines if line.startswith("Placing number: ")]
+    assert len(places) == 81
+    for line in places:
+        words = line.split()
+        assert grid["solution"][int(words[5])][int(words[7])] == int(words[2])
+
+    assert s.RenderSolutionLog(LoadPuzzleString(BASIC_PUZZLE, keep_log=False)[0]) == []
+
+#the sink writes each event as it happens, the same events a list log would hold
+def test_ndjson_log_sink_matches_list_log():
+    full, puzzle = LoadPuzzleString(BASIC_PUZZLE)
+    stream = io.StringIO()
+    grid = s.LoadGivens(s.StreamSolutionLog(s.CreateSudokuGrid(3), stream), puzzle)
+
+    assert grid["solution"] == full["solution"]
+    assert stream.getvalue().splitlines() == [s.EventToJson(full["geometry"], event) for event in full["solution_log"]]
+    first = json.loads(stream.getvalue().splitlines()[0])
+    assert first["event"] in s.EVENT_NAMES and "cells" in first
+
+if __name__ == "__main__":
+    WriteExpected()
@@ -0,0 +1,28 @@
+import pytest
+
+import BatchSolver as bs
+import LizardSudokuSolver as s
+import NumpyBackend as nb
+from benchmarks import BenchmarkCorpus as corpus
+
+pytestmark = pytest.mark.skipif(not nb.NUMPY_AVAILABLE, reason="numpy is not installed")
+
+CORPUS = [(box_size, tier) for box_size in corpus.CORPUS_SIZES for tier in corpus.TIERS]
+
+@pytest.mark.parametrize("box_size, tier", CORPUS)
+def test_numpy_load_matches_python(box_size, tier):
+    for puzzle in corpus.LoadTier(box_size, tier):
+        python_grid = s.LoadGivens(s.CreateSudokuGrid(box_size, False), puzzle)
+        numpy_grid = nb.LoadWithNumpy(s.CreateSudokuGrid(box_size, False), puzzle)
+
+        assert numpy_grid["solution"] == python_grid["solution"]
+        assert numpy_grid["candidates"] == python_grid["candidates"]
+        assert numpy_grid["pair_cells"] == python_grid["pair_cells"]
+
+#a repeated given, and givens that only clash once the singles run
+@pytest.mark.parametrize("line, status", [("11" + "." * 79, "invalid"), (".23456789" + "." * 18 + "1" + "." * 53, "unsolvable")])
+def test_numpy_fails_like_python(line, status):
+    python_result = bs.SolvePuzzleLine((0, line))
+    numpy_result = bs.SolvePuzzleLine((0, line), backend="numpy")
+    assert numpy_result["status"] == python_result["status"] == status
+    assert numpy_result["solution"] == python_result["solution"]
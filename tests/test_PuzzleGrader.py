@@ -0,0 +1,44 @@
+import pytest
+
+import PuzzleGrader as pg
+import PuzzleIO as pio
+
+#solved by singles alone
+SINGLES = "53..7....6..195....98....6.8...6...34..8.3..17...2...6.6....28....419..5....8..79"
+#no technique finds anything, only search can fill it
+EMPTY = "." * 81
+#SINGLES with two more givens that fit their units, the singles then put two different numbers in one cell
+CONTRADICTION = "53..7....6..195....98....6.8.2.6...34..8.3..17...2...6.6.5..28....419..5....8..79"
+
+def test_singles_puzzle_grade():
+    box_size, puzzle = pio.ParsePuzzleString(SINGLES)
+    grade = pg.Grade(box_size, puzzle)
+    assert grade["hardest"] in ("only option", "only position")
+    assert grade["score"] == sum(pg.TECHNIQUE_WEIGHTS[pg.s.EVENT_NAMES.index(name)] * count for name, count in grade["histogram"].items())
+    assert sum(grade["histogram"].values()) == SINGLES.count(".")
+    assert not grade["stopped_early"]
+
+def test_threshold_stops_the_solve():
+    box_size, puzzle = pio.ParsePuzzleString(SINGLES)
+    full = pg.Grade(box_size, puzzle)
+    grade = pg.Grade(box_size, puzzle, threshold=10)
+    assert grade["stopped_early"]
+    assert 10 <= grade["score"] < full["score"]
+
+#only the search event passes the threshold, the solve itself ran to the end
+def test_search_past_threshold_is_not_stopped_early():
+    box_size, puzzle = pio.ParsePuzzleString(EMPTY)
+    grade = pg.Grade(box_size, puzzle, threshold=50)
+    assert not grade["stopped_early"]
+    assert grade["hardest"] == "search"
+    assert grade["score"] == pg.TECHNIQUE_WEIGHTS[pg.s.TECHNIQUE_SEARCH]
+
+@pytest.mark.parametrize("line, status", [(SINGLES, "graded"), (CONTRADICTION, "unsolvable"), ("11" + "." * 79, "invalid"), ("." * 80, "invalid")])
+def test_status(line, status):
+    assert pg.GradePuzzleLine((0, line))["status"] == status
+
+def test_pool_keeps_input_order():
+    lines = [SINGLES, EMPTY, CONTRADICTION] * 4
+    results = list(pg.GradeCorpus(lines, 2, 1))
+    assert [result["index"] for result in results] == list(range(len(lines)))
+    assert results == [dict(result, seconds=results[i]["seconds"]) for i, result in enumerate(pg.GradeCorpus(lines, 1, 1))]
@@ -0,0 +1,72 @@
+import random
+import time
+
+import pytest
+
+import PuzzleGenerator as gen
+import PuzzleIO as pio
+import PuzzleSymmetry as ps
+from benchmarks import BenchmarkCorpus as corpus
+
+#seconds a box_size 5 corpus puzzle and a shuffled copy may take, together they finish in hundredths of a second
+BOX5_TIME_LIMIT = 5
+
+#a random element of the symmetry group applied to puzzle
+def RandomTransform(box_size, puzzle, rng):
+    grid_length = box_size ** 2
+    rows = [band * box_size + r for band in rng.sample(range(box_size), box_size) for r in rng.sample(range(box_size), box_size)]
+    columns = [stack * box_size + c for stack in rng.sample(range(box_size), box_size) for c in rng.sample(range(box_size), box_size)]
+    numbers = [0] + rng.sample(range(1, grid_length + 1), grid_length)
+    grid = ps.TransposeGrid(puzzle) if rng.random() < 0.5 else puzzle
+    return [[numbers[grid[r][c]] for c in columns] for r in rows]
+
+def CreatePuzzle(box_size, seed, clue_fraction):
+    rng = random.Random(seed)
+    full_grid = gen.GenerateFullGrid(box_size, rng)
+    return [[n if rng.random() < clue_fraction else 0 for n in row] for row in full_grid]
+
+@pytest.mark.parametrize("box_size", [2, 3, 4])
+@pytest.mark.parametrize("clue_fraction", [0.0, 0.3, 0.6, 1.0])
+def test_canonical_form_is_invariant(box_size, clue_fraction):
+    rng = random.Random(box_size * 100 + int(clue_fraction * 10))
+    puzzle = CreatePuzzle(box_size, rng.random(), clue_fraction)
+    canonical, transform = ps.Canonicalize(box_size, puzzle)
+
+    assert ps.ApplyTransform(puzzle, transform) == canonical
+    for _ in range(5):
+        copy = RandomTransform(box_size, puzzle, rng)
+        assert ps.Canonicalize(box_size, copy)[0] == canonical
+
+@pytest.mark.parametrize("box_size", [2, 3, 4])
+def test_invert_transform_maps_solution_back(box_size):
+    rng = random.Random(box_size)
+    solution = gen.GenerateFullGrid(box_size, rng)
+    puzzle = [[n if rng.random() < 0.5 else 0 for n in row] for row in solution]
+
+    canonical, transform = ps.Canonicalize(box_size, puzzle)
+    canonical_solution = ps.ApplyTransform(solution, transform)
+
+    assert ps.InvertTransform(canonical, transform) == puzzle
+    assert ps.InvertTransform(canonical_solution, transform) == solution
+    for x in range(len(puzzle)):
+        for y in range(len(puzzle)):
+            if canonical[x][y] != 0:
+                assert canonical_solution[x][y] == canonical[x][y]
+
+def test_dedup_keeps_first_of_each_class():
+    rng = random.Random(5)
+    puzzles = [CreatePuzzle(3, seed, 0.4) for seed in range(4)]
+    lines = [pio.FormatPuzzleString(p) for p in puzzles]
+    copies = [pio.FormatPuzzleString(RandomTransform(3, p, rng)) for p in puzzles[:2]]
+
+    kept = list(ps.DedupLines(lines + copies + ["not a puzzle"]))
+    assert kept == lines + ["not a puzzle"]
+
+@pytest.mark.parametrize("tier", corpus.TIERS)
+def test_box5_corpus_is_fast(tier):
+    rng = random.Random(tier)
+    for puzzle in corpus.LoadTier(5, tier):
+        start = time.perf_counter()
+        canonical = ps.Canonicalize(5, puzzle)[0]
+        assert ps.Canonicalize(5, RandomTransform(5, puzzle, rng))[0] == canonical
+        assert time.perf_counter() - start < BOX5_TIME_LIMIT
@@ -0,0 +1,70 @@
+import BatchSolver as bs
+import PuzzleIO as pio
+import ResultCache as rc
+
+LINE = "53..7....6..195....98....6.8...6...34..8.3..17...2...6.6....28....419..5....8..79"
+
+def SolveLine(line, keep_log=True):
+    box_size, puzzle = pio.ParsePuzzleString(line)
+    grid, solved = bs.SolvePuzzle(box_size, puzzle, keep_log)
+    return box_size, puzzle, grid, solved
+
+def test_memory_round_trip():
+    box_size, puzzle, grid, solved = SolveLine(LINE)
+    cache = rc.ResultCache()
+    assert cache.lookup(box_size, puzzle) == (None, None)
+
+    cache.put(box_size, puzzle, solved, grid["solution"], grid["solution_log"])
+    result, source = cache.lookup(box_size, puzzle)
+    assert source == "memory"
+    assert result["solution"] == grid["solution"]
+    assert result["log"] == grid["solution_log"]
+    assert cache.stats["hits"] == cache.stats["memory_hits"] == 1
+    assert cache.stats["misses"] == 1
+
+#a fresh cache on the same file, as another process would have, reads what the first one wrote
+def test_sqlite_round_trip(tmp_path):
+    path = str(tmp_path / "cache.db")
+    box_size, puzzle, grid, solved = SolveLine(LINE)
+
+    writer = rc.ResultCache(path)
+    writer.put(box_size, puzzle, solved, grid["solution"], grid["solution_log"])
+    writer.close()
+
+    reader = rc.ResultCache(path)
+    result, source = reader.lookup(box_size, puzzle)
+    assert source == "disk"
+    assert result["solved"] == solved
+    assert result["solution"] == grid["solution"]
+    assert result["log"] == grid["solution_log"]
+    assert reader.lookup(box_size, puzzle)[1] == "memory"
+    reader.close()
+
+def test_entry_without_log_misses_when_log_is_needed(tmp_path):
+    box_size, puzzle, grid, solved = SolveLine(LINE, keep_log=False)
+    cache = rc.ResultCache(str(tmp_path / "cache.db"))
+    cache.put(box_size, puzzle, solved, grid["solution"])
+    assert cache.lookup(box_size, puzzle)[1] == "memory"
+    assert cache.lookup(box_size, puzzle, need_log=True) == (None, None)
+    cache.close()
+
+def test_memory_limit_evicts_oldest():
+    cache = rc.ResultCache(limit=2)
+    puzzles = [[[n, 0, 0, 0], [0] * 4, [0] * 4, [0] * 4] for n in range(1, 4)]
+    for puzzle in puzzles:
+        cache.put(2, puzzle, False, puzzle)
+    assert cache.get(2, puzzles[0]) is None
+    assert cache.get(2, puzzles[2]) is not None
+
+#two pool runs over one file, the second is answered from it without solving again
+def test_pool_shares_file(tmp_path):
+    path = str(tmp_path / "cache.db")
+    lines = [LINE, "." * 81, LINE]
+
+    first = list(bs.SolveCorpus(lines, 2, 1, cache_path=path, keep_log=True))
+    second = list(bs.SolveCorpus(lines, 2, 1, cache_path=path, keep_log=True))
+
+    assert all(result["status"] == "solved" for result in first + second)
+    assert all(result["cache"] != "miss" for result in second)
+    assert [result["solution"] for result in second] == [result["solution"] for result in first]
+    assert [result["log"] for result in second] == [result["log"] for result in first]
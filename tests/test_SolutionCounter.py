@@ -0,0 +1,99 @@
+import random
+
+import pytest
+
+import PuzzleGenerator as gen
+import SolutionCounter as sc
+
+#plain backtracking over the cells in order, slow but too simple to be wrong
+def BruteForceCount(box_size, puzzle):
+    grid_length = box_size ** 2
+    grid = [list(row) for row in puzzle]
+    empty = [(x, y) for x in range(grid_length) for y in range(grid_length) if grid[x][y] == 0]
+
+    def Fits(x, y, n):
+        if n in grid[x] or any(grid[k][y] == n for k in range(grid_length)):
+            return False
+        x_min = x - x % box_size
+        y_min = y - y % box_size
+        return all(grid[x_min + i][y_min + j] != n for i in range(box_size) for j in range(box_size))
+
+    def Count(i):
+        if i == len(empty):
+            return 1
+        x, y = empty[i]
+        total = 0
+        for n in range(1, grid_length + 1):
+            if Fits(x, y, n):
+                grid[x][y] = n
+                total += Count(i + 1)
+                grid[x][y] = 0
+        return total
+
+    return Count(0)
+
+def CreatePuzzle(box_size, seed, blanks):
+    rng = random.Random(seed)
+    puzzle = gen.GenerateFullGrid(box_size, rng)
+    cells = [(x, y) for x in range(box_size ** 2) for y in range(box_size ** 2)]
+    for x, y in rng.sample(cells, blanks):
+        puzzle[x][y] = 0
+    return puzzle
+
+@pytest.mark.parametrize("box_size, blanks", [(2, 6), (2, 10), (2, 13), (2, 16), (3, 40), (3, 46), (3, 50)])
+@pytest.mark.parametrize("seed", range(3))
+def test_count_matches_brute_force(box_size, blanks, seed):
+    puzzle = CreatePuzzle(box_size, seed, blanks)
+    assert sc.CountSolutions(box_size, puzzle, limit=10 ** 6) == BruteForceCount(box_size, puzzle)
+
+def test_count_stops_at_limit():
+    puzzle = [[0] * 4 for _ in range(4)]
+    assert sc.CountSolutions(2, puzzle, limit=10 ** 6) == 288
+    assert sc.CountSolutions(2, puzzle, limit=5) == 5
+    assert not sc.HasUniqueSolution(2, puzzle)
+
+def test_contradicting_givens_have_no_solution():
+    #no given repeats, but the top left cell has nothing left
+    puzzle = [[0, 2, 3, 4], [0, 0, 0, 0], [1, 0, 0, 0], [0, 0, 0, 0]]
+    assert sc.CountSolutions(2, puzzle) == 0
+    assert BruteForceCount(2, puzzle) == 0
+
+#bad input is an error, not a puzzle without solutions
+@pytest.mark.parametrize("given", [42, "x", 1])
+def test_invalid_givens_raise(given):
+    puzzle = [[0] * 9 for _ in range(9)]
+    puzzle[0][0] = 1
+    puzzle[0][8] = given
+    with pytest.raises(Exception):
+        sc.CountSolutions(3, puzzle)
+
+@pytest.mark.parametrize("seed", range(2))
+def test_pool_count_matches_serial(seed):
+    puzzle = CreatePuzzle(3, seed, 52)
+    assert sc.CountSolutions(3, puzzle, limit=10 ** 6, processes=2) == sc.CountSolutions(3, puzzle, limit=10 ** 6)
+
+#cells are emptied two at a time, the check on just those cells has to agree with counting the whole puzzle again
+@pytest.mark.parametrize("seed", range(3))
+def test_other_solution_agrees_with_count(seed):
+    rng = random.Random(seed)
+    solution = gen.GenerateFullGrid(3, rng)
+    puzzle = [list(row) for row in solution]
+    cells = [(x, y) for x in range(9) for y in range(9)]
+    rng.shuffle(cells)
+
+    for i in range(0, len(cells), 2):
+        emptied = cells[i:i + 2]
+        for x, y in emptied:
+            puzzle[x][y] = 0
+        other = sc.HasOtherSolution(3, puzzle, solution, emptied)
+        assert other == (sc.CountSolutions(3, puzzle) > 1)
+        if other:
+            for x, y in emptied:
+                puzzle[x][y] = solution[x][y]
+
+def test_unique_solution():
+    solution = gen.GenerateFullGrid(2, random.Random(0))
+    puzzle = [list(row) for row in solution]
+    puzzle[0][0] = 0
+    assert sc.GetUniqueSolution(2, puzzle) == solution
+    assert sc.GetUniqueSolution(2, [[0] * 4 for _ in range(4)]) is None